@@ -0,0 +1,193 @@
+from flask import Blueprint, request, session, jsonify, url_for
+from models import db, Employee
+from queries import paginate_employees, count_employees, keyset_statement, keyset_page, \
+    parse_filters, FILTER_FIELDS, PUBLIC_FILTERS
+from validation import check_employee_data
+from duplicates import duplicate_errors
+from employee_import import IMPORT_FIELDS, as_text, parse_probation
+from employee_export import EXPORT_FIELDS, PUBLIC_FIELDS
+from employee_changes import compacted_statement, changes_statement, change_json
+from rate_limit import rate_limiter, WRITE_LIMITS
+
+# JSON API справочника сотрудников: /api/v1/...
+# Чтение — те же запросы, что и у страницы списка, запись — с той же проверкой
+# данных и правами, что и формы.
+# Вход — через /login, как и для страниц: API использует ту же сессию.
+
+api = Blueprint('api', __name__, url_prefix='/api/v1')
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 5000
+
+def error_response(message, status, errors=None):
+    body = {'error': message}
+    if errors:
+        body['errors'] = errors
+    return jsonify(body), status
+
+def require_hr():
+    if 'user_id' not in session:
+        return error_response('Требуется вход в систему', 401)
+    if not session.get('is_hr'):
+        return error_response('Требуются права кадровика', 403)
+    return None
+
+def visible_fields():
+    # Гостю, как и на странице списка, доступны только ФИО и должность
+    return EXPORT_FIELDS if 'user_id' in session else ['id'] + PUBLIC_FIELDS
+
+def employee_json(employee, fields):
+    data = {field: getattr(employee, field) for field in fields}
+    if 'hire_date' in data:
+        data['hire_date'] = data['hire_date'].isoformat()
+    return data
+
+def fetch_page(search, sort_field, sort_order, page, per_page, after, filters=None):
+    if after is None:
+        return paginate_employees(search, sort_field, sort_order, page, per_page, filters)
+    # Со страницы по курсору COUNT не выполняется: общее число клиент
+    # получает с первой страницы (after пустой)
+    total = count_employees(search, filters) if not after else None
+    statement = keyset_statement(search, sort_field, sort_order, after, per_page, filters)
+    rows = db.session.execute(statement).scalars().all()
+    return keyset_page(rows, sort_field, per_page, total)
+
+@api.get('/employees')
+def list_employees():
+    search = request.args.get('search', '')
+    sort_field = request.args.get('sort', 'id')
+    sort_order = request.args.get('order', 'asc')
+    page = request.args.get('page', 1, type=int)
+    per_page = min(max(request.args.get('per_page', DEFAULT_PER_PAGE, type=int), 1), MAX_PER_PAGE)
+    after = request.args.get('after')
+    # Гость фильтрует только по должности: остальные поля ему не видны
+    filters = parse_filters(request.args, FILTER_FIELDS if 'user_id' in session else PUBLIC_FILTERS)
+
+    result = fetch_page(search, sort_field, sort_order, page, per_page, after, filters)
+    fields = visible_fields()
+    body = {'items': [employee_json(employee, fields) for employee in result.items], 'per_page': per_page}
+    if result.total is not None:
+        body['total'] = result.total
+    if after is not None:
+        body['next_cursor'] = result.next_cursor
+    else:
+        body.update(page=result.page, pages=result.pages)
+    return jsonify(body)
+
+@api.get('/employees/<int:employee_id>')
+def get_employee(employee_id):
+    employee = db.session.get(Employee, employee_id)
+    if employee is None:
+        return error_response('Сотрудник не найден', 404)
+    return jsonify(employee_json(employee, visible_fields()))
+
+@api.get('/changes')
+def list_changes():
+    # Изменения после since по порядку; next_since передаётся в следующий запрос.
+    # Журнал содержит телефоны и email, поэтому доступен только после входа
+    if 'user_id' not in session:
+        return error_response('Требуется вход в систему', 401)
+    since = max(request.args.get('since', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', DEFAULT_CHANGES_LIMIT, type=int), 1), MAX_CHANGES_LIMIT)
+
+    compacted = db.session.execute(compacted_statement()).scalar() or 0
+    if since < compacted:
+        body = {'error': 'Изменения с этого номера уже удалены, нужна полная выгрузка',
+                'compacted_through': compacted}
+        return jsonify(body), 410
+    changes = db.session.execute(changes_statement(since, limit + 1)).scalars().all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return jsonify({'changes': [change_json(change) for change in changes],
+                    'next_since': changes[-1].seq if changes else since,
+                    'has_more': has_more})
+
+def read_payload(current=None):
+    # Поля из JSON в том виде, в каком их присылает форма;
+    # current — значения сотрудника для частичного изменения (PATCH)
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, dict):
+        return None
+    data = {}
+    for field in IMPORT_FIELDS:
+        if field in payload:
+            data[field] = payload[field]
+        elif current is not None:
+            data[field] = getattr(current, field)
+    form = {field: as_text(data.get(field)).strip() for field in IMPORT_FIELDS}
+    return form, parse_probation(data.get('on_probation'))
+
+def apply_payload(employee, form, on_probation, hire_date):
+    employee.full_name = form['full_name']
+    employee.position = form['position']
+    employee.gender = form['gender']
+    employee.phone = form['phone']
+    employee.email = form['email']
+    employee.on_probation = on_probation
+    employee.hire_date = hire_date
+
+@api.post('/employees')
+@rate_limiter.limit(WRITE_LIMITS)
+def create_employee():
+    denied = require_hr()
+    if denied:
+        return denied
+    parsed = read_payload()
+    if parsed is None:
+        return error_response('Ожидается JSON-объект с полями сотрудника', 400)
+    form, on_probation = parsed
+    errors, hire_date = check_employee_data(form)
+    if errors:
+        return error_response('Ошибка в данных сотрудника', 422, errors)
+    errors = duplicate_errors(form)
+    if errors:
+        return error_response('Сотрудник с такими данными уже есть', 409, errors)
+
+    employee = Employee()
+    apply_payload(employee, form, on_probation, hire_date)
+    db.session.add(employee)
+    db.session.commit()
+    response = jsonify(employee_json(employee, EXPORT_FIELDS))
+    response.status_code = 201
+    response.headers['Location'] = url_for('api.get_employee', employee_id=employee.id)
+    return response
+
+@api.route('/employees/<int:employee_id>', methods=['PUT', 'PATCH'])
+@rate_limiter.limit(WRITE_LIMITS)
+def update_employee(employee_id):
+    denied = require_hr()
+    if denied:
+        return denied
+    employee = db.session.get(Employee, employee_id)
+    if employee is None:
+        return error_response('Сотрудник не найден', 404)
+    # PUT заменяет все поля, PATCH — только переданные
+    parsed = read_payload(employee if request.method == 'PATCH' else None)
+    if parsed is None:
+        return error_response('Ожидается JSON-объект с полями сотрудника', 400)
+    form, on_probation = parsed
+    errors, hire_date = check_employee_data(form)
+    if errors:
+        return error_response('Ошибка в данных сотрудника', 422, errors)
+    errors = duplicate_errors(form, exclude_id=employee.id)
+    if errors:
+        return error_response('Сотрудник с такими данными уже есть', 409, errors)
+
+    apply_payload(employee, form, on_probation, hire_date)
+    db.session.commit()
+    return jsonify(employee_json(employee, EXPORT_FIELDS))
+
+@api.delete('/employees/<int:employee_id>')
+@rate_limiter.limit(WRITE_LIMITS)
+def delete_employee(employee_id):
+    denied = require_hr()
+    if denied:
+        return denied
+    employee = db.session.get(Employee, employee_id)
+    if employee is None:
+        return error_response('Сотрудник не найден', 404)
+    db.session.delete(employee)
+    db.session.commit()
+    return '', 204
@@ -1,8 +1,31 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, Response, stream_with_context, abort, jsonify, make_response
 from models import db, User, Employee
-from datetime import datetime
+from passwords import password_hasher, PasswordHashingBusy
+from engine_profile import engine_profile
+from metrics import metrics
+from api import api
+from queries import paginate_employees, paginate_employees_after, detach_items, parse_filters, filter_args, \
+    FILTER_FIELDS, PUBLIC_FILTERS
+from facets import facet_counts, FACETS, PUBLIC_FACETS
+from validation import validate_credentials, check_employee_data
+from duplicates import duplicate_errors
+from employee_batch import run_batch, BATCH_ACTIONS
+from csrf import csrf_token, valid_csrf_token
+from employee_export import iter_export, EXPORT_FORMATS, EXPORT_FIELDS, PUBLIC_FIELDS
+from employee_import import import_employees as import_employee_rows, read_csv_rows, read_json_rows, IMPORT_FIELDS
+from data_version import get_data_version
+from employee_stats import read_stats
+from typeahead import typeahead
+from page_cache import PageCache
+from snapshot import snapshots
+from probation import probation_sweep
+from assets import assets, directory_digest
+from compression import compression
+from rate_limit import rate_limiter, LOGIN_LIMITS, WRITE_LIMITS
+from markupsafe import Markup
+from werkzeug.middleware.proxy_fix import ProxyFix
+import hashlib
 import os
-import re
 from dotenv import load_dotenv
 
 # Проверяем, работаем ли на PythonAnywhere
@@ -30,212 +53,80 @@ else:
 
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Число прокси перед приложением (на PythonAnywhere — один). Адрес клиента
+# берётся из X-Forwarded-For, иначе у всех запросов адрес прокси, и лимиты
+# входа по IP (rate_limit.py) становятся общими для всех пользователей
+app.config['PROXY_FIX_X_FOR'] = int(os.getenv('PROXY_FIX_X_FOR', 1 if is_pythonanywhere else 0))
+if app.config['PROXY_FIX_X_FOR']:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+# Размер порции при массовом импорте сотрудников
+app.config['IMPORT_CHUNK_SIZE'] = int(os.getenv('IMPORT_CHUNK_SIZE', 1000))
+
+# Режим журнала и другие PRAGMA SQLite, размер пула подключений
+engine_profile.init_app(app)
+
 # Инициализируем базу данных
 db.init_app(app)
 
-# Валидация данных
-def validate_credentials(login, password):
-    if not login or not password:
-        return False, "Логин и пароль не могут быть пустыми"
-    
-    if not re.match(r'^[a-zA-Z0-9!@#$%^&*()_+\-=\[\]{};\':"\\|,.<>\/?]*$', login):
-        return False, "Логин может содержать только латинские буквы, цифры и знаки препинания"
-    
-    if not re.match(r'^[a-zA-Z0-9!@#$%^&*()_+\-=\[\]{};\':"\\|,.<>\/?]*$', password):
-        return False, "Пароль может содержать только латинские буквы, цифры и знаки препинания"
-    
-    return True, ""
+# Кэш страниц списка сотрудников: число записей и время жизни в секундах
+app.config['PAGE_CACHE_SIZE'] = int(os.getenv('PAGE_CACHE_SIZE', 256))
+app.config['PAGE_CACHE_TTL'] = float(os.getenv('PAGE_CACHE_TTL', 60))
+# Результаты запросов не зависят от роли и общие для всех, а готовая
+# разметка хранится отдельно для гостя, пользователя и кадровика
+results_cache = PageCache(app.config['PAGE_CACHE_SIZE'], app.config['PAGE_CACHE_TTL'])
+pages_cache = PageCache(app.config['PAGE_CACHE_SIZE'], app.config['PAGE_CACHE_TTL'])
 
-def validate_employee_data(data):
-    errors = []
-    
-    # Проверка ФИО
-    full_name = data.get('full_name', '').strip()
-    if not full_name or len(full_name) < 2:
-        errors.append("ФИО должно содержать не менее 2 символов")
-    elif len(full_name) > 100:
-        errors.append("ФИО не должно превышать 100 символов")
-    elif not re.match(r'^[а-яА-ЯёЁ\s\-\.]+$', full_name):
-        errors.append("ФИО может содержать только русские буквы, пробелы, точки и дефисы")
-    
-    # Проверка должности
-    position = data.get('position', '').strip()
-    if not position:
-        errors.append("Должность не может быть пустой")
-    elif len(position) > 100:
-        errors.append("Название должности не должно превышать 100 символов")
-    
-    # Проверка пола
-    if not data.get('gender') or data['gender'] not in ['male', 'female']:
-        errors.append("Укажите пол")
-    
-    # Проверка телефона
-    phone = data.get('phone', '').strip()
-    if not phone:
-        errors.append("Телефон не может быть пустым")
-    elif not re.match(r'^[\d\s\-\+\(\)]{10,20}$', phone):
-        errors.append("Телефон должен содержать от 10 до 20 цифр и допустимых символов (+, -, (), пробелы)")
-    elif len(re.sub(r'[^\d]', '', phone)) < 10:
-        errors.append("Телефон должен содержать не менее 10 цифр")
-    
-    # Проверка email
-    email = data.get('email', '').strip()
-    if not email:
-        errors.append("Email не может быть пустым")
-    elif not re.match(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$', email):
-        errors.append("Некорректный формат email")
-    elif len(email) > 100:
-        errors.append("Email не должен превышать 100 символов")
-    
-    # Проверка даты устройства
-    hire_date_str = data.get('hire_date', '')
-    if not hire_date_str:
-        errors.append("Дата устройства на работу обязательна")
-    else:
-        try:
-            hire_date = datetime.strptime(hire_date_str, '%Y-%m-%d')
-            if hire_date > datetime.now():
-                errors.append("Дата устройства не может быть в будущем")
-            if hire_date.year < 2000:
-                errors.append("Дата устройства не может быть раньше 2000 года")
-        except ValueError:
-            errors.append("Некорректный формат даты")
-    
-    return errors
-
-# Фиксированный список сотрудников
-def get_employees_data():
-    return [
-        # Руководство
-        {'full_name': 'Иванов Александр Сергеевич', 'position': 'Директор', 'gender': 'male', 'phone': '+7-495-100-10-01', 'email': 'ivanov@company.com', 'on_probation': False, 'hire_date': '2018-03-15'},
-        {'full_name': 'Петрова Елена Владимировна', 'position': 'Заместитель директора', 'gender': 'female', 'phone': '+7-495-100-10-02', 'email': 'petrova@company.com', 'on_probation': False, 'hire_date': '2019-06-20'},
-        {'full_name': 'Сидоров Дмитрий Николаевич', 'position': 'Начальник отдела', 'gender': 'male', 'phone': '+7-495-100-10-03', 'email': 'sidorov@company.com', 'on_probation': False, 'hire_date': '2018-11-10'},
-        
-        # Отдел разработки
-        {'full_name': 'Козлов Артем Игоревич', 'position': 'Ведущий разработчик', 'gender': 'male', 'phone': '+7-495-100-10-04', 'email': 'kozlov@company.com', 'on_probation': False, 'hire_date': '2020-01-12'},
-        {'full_name': 'Федорова Мария Петровна', 'position': 'Разработчик', 'gender': 'female', 'phone': '+7-495-100-10-05', 'email': 'fedorova@company.com', 'on_probation': False, 'hire_date': '2020-03-18'},
-        {'full_name': 'Никитин Сергей Александрович', 'position': 'Разработчик', 'gender': 'male', 'phone': '+7-495-100-10-06', 'email': 'nikitin@company.com', 'on_probation': False, 'hire_date': '2021-07-22'},
-        {'full_name': 'Орлова Анна Дмитриевна', 'position': 'Разработчик', 'gender': 'female', 'phone': '+7-495-100-10-07', 'email': 'orlova@company.com', 'on_probation': False, 'hire_date': '2021-09-14'},
-        {'full_name': 'Белов Павел Олегович', 'position': 'Младший разработчик', 'gender': 'male', 'phone': '+7-495-100-10-08', 'email': 'belov@company.com', 'on_probation': True, 'hire_date': '2023-11-05'},
-        {'full_name': 'Громова Ирина Викторовна', 'position': 'Младший разработчик', 'gender': 'female', 'phone': '+7-495-100-10-09', 'email': 'gromova@company.com', 'on_probation': True, 'hire_date': '2023-12-10'},
-        {'full_name': 'Данилов Максим Сергеевич', 'position': 'Инженер', 'gender': 'male', 'phone': '+7-495-100-10-10', 'email': 'danilov@company.com', 'on_probation': False, 'hire_date': '2020-08-30'},
-        
-        # Отдел тестирования
-        {'full_name': 'Семенова Ольга Игоревна', 'position': 'Ведущий тестировщик', 'gender': 'female', 'phone': '+7-495-100-10-11', 'email': 'semenova@company.com', 'on_probation': False, 'hire_date': '2019-04-25'},
-        {'full_name': 'Тихонов Андрей Владимирович', 'position': 'Тестировщик', 'gender': 'male', 'phone': '+7-495-100-10-12', 'email': 'tikhonov@company.com', 'on_probation': False, 'hire_date': '2020-02-14'},
-        {'full_name': 'Устинова Татьяна Михайловна', 'position': 'Тестировщик', 'gender': 'female', 'phone': '+7-495-100-10-13', 'email': 'ustinova@company.com', 'on_probation': False, 'hire_date': '2021-05-19'},
-        {'full_name': 'Филиппов Алексей Николаевич', 'position': 'Тестировщик', 'gender': 'male', 'phone': '+7-495-100-10-14', 'email': 'filippov@company.com', 'on_probation': True, 'hire_date': '2023-10-08'},
-        
-        # Отдел аналитики
-        {'full_name': 'Харитонова Екатерина Сергеевна', 'position': 'Ведущий аналитик', 'gender': 'female', 'phone': '+7-495-100-10-15', 'email': 'kharitonova@company.com', 'on_probation': False, 'hire_date': '2018-09-12'},
-        {'full_name': 'Цветков Иван Петрович', 'position': 'Аналитик', 'gender': 'male', 'phone': '+7-495-100-10-16', 'email': 'tsvetkov@company.com', 'on_probation': False, 'hire_date': '2020-11-03'},
-        {'full_name': 'Шестакова Людмила Анатольевна', 'position': 'Аналитик', 'gender': 'female', 'phone': '+7-495-100-10-17', 'email': 'shestakova@company.com', 'on_probation': False, 'hire_date': '2021-03-28'},
-        
-        # Отдел дизайна
-        {'full_name': 'Щербаков Денис Олегович', 'position': 'Ведущий дизайнер', 'gender': 'male', 'phone': '+7-495-100-10-18', 'email': 'shcherbakov@company.com', 'on_probation': False, 'hire_date': '2019-07-15'},
-        {'full_name': 'Яковлева Наталья Владимировна', 'position': 'Дизайнер', 'gender': 'female', 'phone': '+7-495-100-10-19', 'email': 'yakovleva@company.com', 'on_probation': False, 'hire_date': '2020-04-22'},
-        {'full_name': 'Абрамов Артем Ильич', 'position': 'Дизайнер', 'gender': 'male', 'phone': '+7-495-100-10-20', 'email': 'abramov@company.com', 'on_probation': True, 'hire_date': '2023-08-14'},
-        
-        # Отдел маркетинга
-        {'full_name': 'Борисова Светлана Александровна', 'position': 'Руководитель маркетинга', 'gender': 'female', 'phone': '+7-495-100-10-21', 'email': 'borisova@company.com', 'on_probation': False, 'hire_date': '2018-12-05'},
-        {'full_name': 'Волков Михаил Юрьевич', 'position': 'Маркетолог', 'gender': 'male', 'phone': '+7-495-100-10-22', 'email': 'volkov@company.com', 'on_probation': False, 'hire_date': '2020-06-18'},
-        {'full_name': 'Григорьева Анастасия Павловна', 'position': 'Маркетолог', 'gender': 'female', 'phone': '+7-495-100-10-23', 'email': 'grigoreva@company.com', 'on_probation': False, 'hire_date': '2021-09-30'},
-        {'full_name': 'Дмитриев Константин Викторович', 'position': 'Маркетолог', 'gender': 'male', 'phone': '+7-495-100-10-24', 'email': 'dmitriev@company.com', 'on_probation': True, 'hire_date': '2023-11-20'},
-        
-        # Отдел продаж
-        {'full_name': 'Ефимова Ольга Сергеевна', 'position': 'Руководитель продаж', 'gender': 'female', 'phone': '+7-495-100-10-25', 'email': 'efimova@company.com', 'on_probation': False, 'hire_date': '2019-02-14'},
-        {'full_name': 'Жуков Алексей Дмитриевич', 'position': 'Менеджер по продажам', 'gender': 'male', 'phone': '+7-495-100-10-26', 'email': 'zhukov@company.com', 'on_probation': False, 'hire_date': '2020-08-11'},
-        {'full_name': 'Зайцева Марина Игоревна', 'position': 'Менеджер по продажам', 'gender': 'female', 'phone': '+7-495-100-10-27', 'email': 'zaitseva@company.com', 'on_probation': False, 'hire_date': '2021-01-25'},
-        {'full_name': 'Ильин Павел Анатольевич', 'position': 'Менеджер по продажам', 'gender': 'male', 'phone': '+7-495-100-10-28', 'email': 'ilin@company.com', 'on_probation': True, 'hire_date': '2023-10-15'},
-        
-        # Бухгалтерия
-        {'full_name': 'Карпова Виктория Олеговна', 'position': 'Главный бухгалтер', 'gender': 'female', 'phone': '+7-495-100-10-29', 'email': 'karpova@company.com', 'on_probation': False, 'hire_date': '2018-05-20'},
-        {'full_name': 'Ларин Александр Владимирович', 'position': 'Бухгалтер', 'gender': 'male', 'phone': '+7-495-100-10-30', 'email': 'larin@company.com', 'on_probation': False, 'hire_date': '2019-11-08'},
-        {'full_name': 'Максимова Елена Николаевна', 'position': 'Бухгалтер', 'gender': 'female', 'phone': '+7-495-100-10-31', 'email': 'maksimova@company.com', 'on_probation': False, 'hire_date': '2020-07-12'},
-        
-        # Отдел кадров
-        {'full_name': 'Носова Ирина Васильевна', 'position': 'Специалист по кадрам', 'gender': 'female', 'phone': '+7-495-100-10-32', 'email': 'nosova@company.com', 'on_probation': False, 'hire_date': '2019-03-18'},
-        {'full_name': 'Овчинников Денис Сергеевич', 'position': 'Специалист по кадрам', 'gender': 'male', 'phone': '+7-495-100-10-33', 'email': 'ovchinnikov@company.com', 'on_probation': False, 'hire_date': '2020-09-22'},
-        {'full_name': 'Павлова Анна Александровна', 'position': 'Специалист по кадрам', 'gender': 'female', 'phone': '+7-495-100-10-34', 'email': 'pavlova@company.com', 'on_probation': True, 'hire_date': '2023-12-01'},
-        
-        # Административный отдел
-        {'full_name': 'Романов Кирилл Игоревич', 'position': 'Администратор', 'gender': 'male', 'phone': '+7-495-100-10-35', 'email': 'romanov@company.com', 'on_probation': False, 'hire_date': '2020-02-10'},
-        {'full_name': 'Савельева Татьяна Дмитриевна', 'position': 'Администратор', 'gender': 'female', 'phone': '+7-495-100-10-36', 'email': 'savelieva@company.com', 'on_probation': False, 'hire_date': '2021-04-15'},
-        
-        # Технический отдел
-        {'full_name': 'Тарасов Владимир Петрович', 'position': 'Системный администратор', 'gender': 'male', 'phone': '+7-495-100-10-37', 'email': 'tarasov@company.com', 'on_probation': False, 'hire_date': '2018-08-12'},
-        {'full_name': 'Уварова Мария Сергеевна', 'position': 'Технический специалист', 'gender': 'female', 'phone': '+7-495-100-10-38', 'email': 'uvarova@company.com', 'on_probation': False, 'hire_date': '2020-10-05'},
-        
-        # Дополнительные сотрудники
-        {'full_name': 'Фомин Алексей Николаевич', 'position': 'Разработчик', 'gender': 'male', 'phone': '+7-495-100-10-39', 'email': 'fomin@company.com', 'on_probation': False, 'hire_date': '2021-06-20'},
-        {'full_name': 'Хохлов Дмитрий Владимирович', 'position': 'Разработчик', 'gender': 'male', 'phone': '+7-495-100-10-40', 'email': 'khokhlov@company.com', 'on_probation': False, 'hire_date': '2021-08-14'},
-        {'full_name': 'Царева Ольга Игоревна', 'position': 'Аналитик', 'gender': 'female', 'phone': '+7-495-100-10-41', 'email': 'tsareva@company.com', 'on_probation': False, 'hire_date': '2022-01-10'},
-        {'full_name': 'Чернов Артем Сергеевич', 'position': 'Тестировщик', 'gender': 'male', 'phone': '+7-495-100-10-42', 'email': 'chernov@company.com', 'on_probation': True, 'hire_date': '2023-09-05'},
-        {'full_name': 'Широков Иван Алексеевич', 'position': 'Дизайнер', 'gender': 'male', 'phone': '+7-495-100-10-43', 'email': 'shirokov@company.com', 'on_probation': False, 'hire_date': '2020-12-18'},
-        {'full_name': 'Щукина Екатерина Викторовна', 'position': 'Маркетолог', 'gender': 'female', 'phone': '+7-495-100-10-44', 'email': 'shchukina@company.com', 'on_probation': False, 'hire_date': '2021-02-22'},
-        {'full_name': 'Юдин Павел Олегович', 'position': 'Менеджер по продажам', 'gender': 'male', 'phone': '+7-495-100-10-45', 'email': 'yudin@company.com', 'on_probation': True, 'hire_date': '2023-11-30'},
-        {'full_name': 'Яковлев Андрей Николаевич', 'position': 'Бухгалтер', 'gender': 'male', 'phone': '+7-495-100-10-46', 'email': 'yakovlev@company.com', 'on_probation': False, 'hire_date': '2019-10-15'},
-        {'full_name': 'Антонова Светлана Дмитриевна', 'position': 'Специалист по кадрам', 'gender': 'female', 'phone': '+7-495-100-10-47', 'email': 'antonova@company.com', 'on_probation': False, 'hire_date': '2020-05-20'},
-        {'full_name': 'Беляев Михаил Сергеевич', 'position': 'Разработчик', 'gender': 'male', 'phone': '+7-495-100-10-48', 'email': 'belyaev@company.com', 'on_probation': False, 'hire_date': '2021-07-08'},
-        {'full_name': 'Васнецова Анастасия Игоревна', 'position': 'Аналитик', 'gender': 'female', 'phone': '+7-495-100-10-49', 'email': 'vasnetsova@company.com', 'on_probation': False, 'hire_date': '2022-03-12'},
-        {'full_name': 'Горбунов Денис Владимирович', 'position': 'Тестировщик', 'gender': 'male', 'phone': '+7-495-100-10-50', 'email': 'gorbunov@company.com', 'on_probation': True, 'hire_date': '2023-10-25'},
-        {'full_name': 'Демин Алексей Петрович', 'position': 'Дизайнер', 'gender': 'male', 'phone': '+7-495-100-10-51', 'email': 'demin@company.com', 'on_probation': False, 'hire_date': '2020-11-30'},
-        {'full_name': 'Ершова Марина Александровна', 'position': 'Маркетолог', 'gender': 'female', 'phone': '+7-495-100-10-52', 'email': 'ershova@company.com', 'on_probation': False, 'hire_date': '2021-04-05'},
-        {'full_name': 'Жданов Игорь Викторович', 'position': 'Менеджер по продажам', 'gender': 'male', 'phone': '+7-495-100-10-53', 'email': 'zhdanov@company.com', 'on_probation': True, 'hire_date': '2023-12-15'},
-        {'full_name': 'Зимин Сергей Олегович', 'position': 'Бухгалтер', 'gender': 'male', 'phone': '+7-495-100-10-54', 'email': 'zimin@company.com', 'on_probation': False, 'hire_date': '2019-08-22'},
-        {'full_name': 'Исакова Юлия Владимировна', 'position': 'Специалист по кадрам', 'gender': 'female', 'phone': '+7-495-100-10-55', 'email': 'isakova@company.com', 'on_probation': False, 'hire_date': '2020-06-14'},
-        {'full_name': 'Калашников Артем Дмитриевич', 'position': 'Разработчик', 'gender': 'male', 'phone': '+7-495-100-10-56', 'email': 'kalashnikov@company.com', 'on_probation': False, 'hire_date': '2021-09-28'},
-        {'full_name': 'Лебедева Ольга Сергеевна', 'position': 'Аналитик', 'gender': 'female', 'phone': '+7-495-100-10-57', 'email': 'lebedeva@company.com', 'on_probation': False, 'hire_date': '2022-02-18'},
-        {'full_name': 'Морозов Дмитрий Игоревич', 'position': 'Тестировщик', 'gender': 'male', 'phone': '+7-495-100-10-58', 'email': 'morozov@company.com', 'on_probation': True, 'hire_date': '2023-11-10'},
-        {'full_name': 'Некрасова Анна Владимировна', 'position': 'Дизайнер', 'gender': 'female', 'phone': '+7-495-100-10-59', 'email': 'nekrasova@company.com', 'on_probation': False, 'hire_date': '2020-12-03'},
-        {'full_name': 'Осипов Владимир Александрович', 'position': 'Маркетолог', 'gender': 'male', 'phone': '+7-495-100-10-60', 'email': 'osipov@company.com', 'on_probation': False, 'hire_date': '2021-05-25'},
-        {'full_name': 'Поляков Илья Сергеевич', 'position': 'Менеджер по продажам', 'gender': 'male', 'phone': '+7-495-100-10-61', 'email': 'polyakov@company.com', 'on_probation': True, 'hire_date': '2023-10-20'},
-        {'full_name': 'Рожкова Елена Викторовна', 'position': 'Бухгалтер', 'gender': 'female', 'phone': '+7-495-100-10-62', 'email': 'rozhkova@company.com', 'on_probation': False, 'hire_date': '2019-07-30'},
-        {'full_name': 'Сазонов Алексей Николаевич', 'position': 'Специалист по кадрам', 'gender': 'male', 'phone': '+7-495-100-10-63', 'email': 'sazonov@company.com', 'on_probation': False, 'hire_date': '2020-08-08'},
-        {'full_name': 'Тихомирова Ирина Олеговна', 'position': 'Разработчик', 'gender': 'female', 'phone': '+7-495-100-10-64', 'email': 'tikhomirova@company.com', 'on_probation': False, 'hire_date': '2021-11-12'},
-        {'full_name': 'Ушаков Денис Владимирович', 'position': 'Аналитик', 'gender': 'male', 'phone': '+7-495-100-10-65', 'email': 'ushakov@company.com', 'on_probation': False, 'hire_date': '2022-04-20'},
-        {'full_name': 'Федосеев Максим Игоревич', 'position': 'Тестировщик', 'gender': 'male', 'phone': '+7-495-100-10-66', 'email': 'fedoseev@company.com', 'on_probation': True, 'hire_date': '2023-09-15'},
-        {'full_name': 'Хромова Наталья Александровна', 'position': 'Дизайнер', 'gender': 'female', 'phone': '+7-495-100-10-67', 'email': 'khromova@company.com', 'on_probation': False, 'hire_date': '2021-01-08'},
-        {'full_name': 'Цыганков Павел Сергеевич', 'position': 'Маркетолог', 'gender': 'male', 'phone': '+7-495-100-10-68', 'email': 'tsygankov@company.com', 'on_probation': False, 'hire_date': '2021-06-14'},
-        {'full_name': 'Чеботарев Андрей Викторович', 'position': 'Менеджер по продажам', 'gender': 'male', 'phone': '+7-495-100-10-69', 'email': 'chebotarev@company.com', 'on_probation': True, 'hire_date': '2023-12-05'},
-        {'full_name': 'Шмелева Оксана Дмитриевна', 'position': 'Бухгалтер', 'gender': 'female', 'phone': '+7-495-100-10-70', 'email': 'shmeleva@company.com', 'on_probation': False, 'hire_date': '2019-09-18'},
-        {'full_name': 'Щедрин Владислав Олегович', 'position': 'Специалист по кадрам', 'gender': 'male', 'phone': '+7-495-100-10-71', 'email': 'shchedrin@company.com', 'on_probation': False, 'hire_date': '2020-07-22'},
-        {'full_name': 'Юрьева Татьяна Сергеевна', 'position': 'Разработчик', 'gender': 'female', 'phone': '+7-495-100-10-72', 'email': 'yureva@company.com', 'on_probation': False, 'hire_date': '2021-10-30'},
-        {'full_name': 'Яшин Алексей Дмитриевич', 'position': 'Аналитик', 'gender': 'male', 'phone': '+7-495-100-10-73', 'email': 'yashin@company.com', 'on_probation': False, 'hire_date': '2022-05-12'},
-        {'full_name': 'Алексеев Константин Игоревич', 'position': 'Тестировщик', 'gender': 'male', 'phone': '+7-495-100-10-74', 'email': 'alekseev@company.com', 'on_probation': True, 'hire_date': '2023-08-28'},
-        {'full_name': 'Богданова Мария Владимировна', 'position': 'Дизайнер', 'gender': 'female', 'phone': '+7-495-100-10-75', 'email': 'bogdanova@company.com', 'on_probation': False, 'hire_date': '2021-02-14'},
-        {'full_name': 'Воронов Игорь Александрович', 'position': 'Маркетолог', 'gender': 'male', 'phone': '+7-495-100-10-76', 'email': 'voronov@company.com', 'on_probation': False, 'hire_date': '2021-07-20'},
-        {'full_name': 'Гусев Дмитрий Сергеевич', 'position': 'Менеджер по продажам', 'gender': 'male', 'phone': '+7-495-100-10-77', 'email': 'gusev@company.com', 'on_probation': True, 'hire_date': '2023-11-25'},
-        {'full_name': 'Давыдова Екатерина Игоревна', 'position': 'Бухгалтер', 'gender': 'female', 'phone': '+7-495-100-10-78', 'email': 'davydova@company.com', 'on_probation': False, 'hire_date': '2019-12-10'},
-        {'full_name': 'Егоров Артем Владимирович', 'position': 'Специалист по кадрам', 'gender': 'male', 'phone': '+7-495-100-10-79', 'email': 'egorov@company.com', 'on_probation': False, 'hire_date': '2020-09-05'},
-        {'full_name': 'Журавлева Надежда Петровна', 'position': 'Разработчик', 'gender': 'female', 'phone': '+7-495-100-10-80', 'email': 'zhuravleva@company.com', 'on_probation': False, 'hire_date': '2021-12-18'},
-        {'full_name': 'Зуев Александр Олегович', 'position': 'Аналитик', 'gender': 'male', 'phone': '+7-495-100-10-81', 'email': 'zuev@company.com', 'on_probation': False, 'hire_date': '2022-06-22'},
-        {'full_name': 'Игнатьев Сергей Викторович', 'position': 'Тестировщик', 'gender': 'male', 'phone': '+7-495-100-10-82', 'email': 'ignatev@company.com', 'on_probation': True, 'hire_date': '2023-10-10'},
-        {'full_name': 'Казакова Анна Александровна', 'position': 'Дизайнер', 'gender': 'female', 'phone': '+7-495-100-10-83', 'email': 'kazakova@company.com', 'on_probation': False, 'hire_date': '2021-03-28'},
-        {'full_name': 'Логинов Владимир Дмитриевич', 'position': 'Маркетолог', 'gender': 'male', 'phone': '+7-495-100-10-84', 'email': 'loginov@company.com', 'on_probation': False, 'hire_date': '2021-08-15'},
-        {'full_name': 'Матвеев Илья Сергеевич', 'position': 'Менеджер по продажам', 'gender': 'male', 'phone': '+7-495-100-10-85', 'email': 'matveev@company.com', 'on_probation': True, 'hire_date': '2023-12-20'},
-        {'full_name': 'Новикова Ольга Викторовна', 'position': 'Бухгалтер', 'gender': 'female', 'phone': '+7-495-100-10-86', 'email': 'novikova@company.com', 'on_probation': False, 'hire_date': '2020-01-15'},
-        {'full_name': 'Орлов Денис Александрович', 'position': 'Специалист по кадрам', 'gender': 'male', 'phone': '+7-495-100-10-87', 'email': 'orlov@company.com', 'on_probation': False, 'hire_date': '2020-10-12'},
-        {'full_name': 'Петухова Ирина Сергеевна', 'position': 'Разработчик', 'gender': 'female', 'phone': '+7-495-100-10-88', 'email': 'petukhova@company.com', 'on_probation': False, 'hire_date': '2022-01-25'},
-        {'full_name': 'Рубцов Алексей Игоревич', 'position': 'Аналитик', 'gender': 'male', 'phone': '+7-495-100-10-89', 'email': 'rubtsov@company.com', 'on_probation': False, 'hire_date': '2022-07-30'},
-        {'full_name': 'Селиванова Марина Дмитриевна', 'position': 'Тестировщик', 'gender': 'female', 'phone': '+7-495-100-10-90', 'email': 'selivanova@company.com', 'on_probation': True, 'hire_date': '2023-09-20'},
-        {'full_name': 'Трофимов Артем Владимирович', 'position': 'Дизайнер', 'gender': 'male', 'phone': '+7-495-100-10-91', 'email': 'trofimov@company.com', 'on_probation': False, 'hire_date': '2021-04-10'},
-        {'full_name': 'Успенская Юлия Александровна', 'position': 'Маркетолог', 'gender': 'female', 'phone': '+7-495-100-10-92', 'email': 'uspenskaya@company.com', 'on_probation': False, 'hire_date': '2021-09-05'},
-        {'full_name': 'Фролов Иван Сергеевич', 'position': 'Менеджер по продажам', 'gender': 'male', 'phone': '+7-495-100-10-93', 'email': 'frolov@company.com', 'on_probation': True, 'hire_date': '2023-11-15'},
-        {'full_name': 'Хабаров Дмитрий Олегович', 'position': 'Бухгалтер', 'gender': 'male', 'phone': '+7-495-100-10-94', 'email': 'khabarov@company.com', 'on_probation': False, 'hire_date': '2020-02-28'},
-        {'full_name': 'Цветаева Елена Викторовна', 'position': 'Специалист по кадрам', 'gender': 'female', 'phone': '+7-495-100-10-95', 'email': 'tsvetaeva@company.com', 'on_probation': False, 'hire_date': '2020-11-08'},
-        {'full_name': 'Чижов Андрей Александрович', 'position': 'Разработчик', 'gender': 'male', 'phone': '+7-495-100-10-96', 'email': 'chizhov@company.com', 'on_probation': False, 'hire_date': '2022-02-14'},
-        {'full_name': 'Шарова Ольга Игоревна', 'position': 'Аналитик', 'gender': 'female', 'phone': '+7-495-100-10-97', 'email': 'sharova@company.com', 'on_probation': False, 'hire_date': '2022-08-18'},
-        {'full_name': 'Щеглов Павел Дмитриевич', 'position': 'Тестировщик', 'gender': 'male', 'phone': '+7-495-100-10-98', 'email': 'shcheglov@company.com', 'on_probation': True, 'hire_date': '2023-10-05'},
-        {'full_name': 'Юдина Анна Владимировна', 'position': 'Дизайнер', 'gender': 'female', 'phone': '+7-495-100-10-99', 'email': 'yudina@company.com', 'on_probation': False, 'hire_date': '2021-05-22'},
-        {'full_name': 'Якушев Михаил Сергеевич', 'position': 'Маркетолог', 'gender': 'male', 'phone': '+7-495-100-10-00', 'email': 'yakushev@company.com', 'on_probation': False, 'hire_date': '2021-10-12'}
-    ]
+# Снимок справочника в общем для воркеров файле (SNAPSHOT_ENABLED=1, см. snapshot.py)
+snapshots.init_app(app)
+
+# Снятие испытательного срока по дате приёма (PROBATION_*, см. probation.py)
+probation_sweep.init_app(app)
+
+# Статические файлы под адресами с хешем содержимого (asset_url в шаблонах)
+assets.init_app(app)
+
+# Ограничение частоты входа и изменений (RATE_LIMIT_*, см. rate_limit.py)
+rate_limiter.init_app(app)
+
+# Сжатие ответов gzip/brotli (COMPRESS_*, см. compression.py)
+compression.init_app(app)
+
+# Токен для форм, меняющих данные (csrf_token() в шаблонах)
+app.jinja_env.globals['csrf_token'] = csrf_token
+
+# Номер выпуска входит в ETag страниц: после обновления шаблонов
+# браузеры получат новую разметку, даже если данные не менялись
+app.config['RELEASE'] = os.getenv('RELEASE') or directory_digest(app.template_folder, app.static_folder)
+
+# JSON API /api/v1
+app.register_blueprint(api)
+
+# Пул для хеширования паролей: метод, число потоков и длина очереди
+password_hasher.init_app(app)
+
+# Время ответов, SQL-запросов и шаблонов; /metrics в формате Prometheus
+metrics.init_app(app)
+metrics.add_gauges('password_hash', password_hasher.stats)
+metrics.add_gauges('employees_results_cache', results_cache.stats)
+metrics.add_gauges('employees_pages_cache', pages_cache.stats)
+metrics.add_gauges('employees_snapshot', snapshots.stats)
+metrics.add_gauges('probation_sweep', probation_sweep.stats)
+metrics.add_gauges('compression', compression.stats)
+metrics.add_gauges('rate_limit', rate_limiter.stats)
+
+def _pool_stats():
+    with app.app_context():
+        return engine_profile.pool_stats(db.engine)
+
+metrics.add_gauges('db_pool', _pool_stats)
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limiter.limit(LOGIN_LIMITS, template='login.html')
 def login():
     if request.method == 'POST':
         login = request.form.get('login')
@@ -247,7 +138,22 @@ def login():
             return render_template('login.html')
         
         user = User.query.filter_by(login=login).first()
-        if user and user.check_password(password):
+        try:
+            password_ok = user is not None and user.check_password(password)
+        except PasswordHashingBusy:
+            flash('Сервер перегружен, попробуйте войти через несколько секунд', 'error')
+            return render_template('login.html'), 503
+        
+        # Хеш старым методом или с другой стоимостью пересчитывается при входе.
+        # Если пул занят, пароль уже проверен: пересчёт откладывается до следующего входа
+        if password_ok and user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except PasswordHashingBusy:
+                pass
+        
+        if password_ok:
             session['user_id'] = user.id
             session['user_login'] = user.login
             session['is_hr'] = user.is_hr
@@ -259,6 +165,7 @@ def login():
     return render_template('login.html')
 
 @app.route('/register', methods=['GET', 'POST'])
+@rate_limiter.limit(WRITE_LIMITS, template='register.html')
 def register():
     # Только авторизованные кадровики могут регистрировать новых пользователей
     if 'user_id' not in session or not session.get('is_hr'):
@@ -339,83 +246,188 @@ def employees():
     search = request.args.get('search', '')
     sort_field = request.args.get('sort', 'id')
     sort_order = request.args.get('order', 'asc')
+    after = request.args.get('after', '')
+    
+    is_authenticated = 'user_id' in session
+    is_hr = bool(session.get('is_hr', False))
+    filters = parse_filters(request.args, FILTER_FIELDS if is_authenticated else PUBLIC_FILTERS)
+    filter_key = tuple(sorted(filter_args(filters).items()))
     
-    # Получаем всех сотрудников
-    all_employees = Employee.query.all()
+    # Версия читается до выборки: если данные изменятся в процессе,
+    # запись в кэше просто устареет при следующем запросе
+    version = get_data_version()
+    page_key = (search, sort_field, sort_order, page, after, filter_key, is_authenticated, is_hr)
     
-    # Применяем поиск без учета регистра
-    if search:
-        search_lower = search.lower()
-        filtered_employees = []
-        for employee in all_employees:
-            if (search_lower in employee.full_name.lower() or 
-                search_lower in employee.position.lower() or 
-                search_lower in employee.phone.lower() or 
-                search_lower in employee.email.lower()):
-                filtered_employees.append(employee)
-        all_employees = filtered_employees
+    # Страница зависит от данных, параметров, роли, имени пользователя в шапке
+    # и у кадровика — от токена формы действий над выбранными сотрудниками.
+    # Пока в сессии есть непоказанные сообщения, ответ нельзя заменить на 304
+    etag = None
+    if not session.get('_flashes'):
+        token = csrf_token() if is_hr else None
+        etag = hashlib.sha1(repr((app.config['RELEASE'], version, page_key,
+                                  session.get('user_login'), token)).encode('utf-8')).hexdigest()
+        if request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
     
-    # Применяем сортировку
-    if sort_field in ['full_name', 'position', 'gender', 'phone', 'email', 'hire_date', 'on_probation']:
-        reverse = (sort_order == 'desc')
+    content = pages_cache.get(page_key, version)
+    if content is None:
+        result_key = (search, sort_field, sort_order, page, after, filter_key)
+        employees_paginated = results_cache.get(result_key, version)
+        if employees_paginated is None:
+            # Поиск, фильтры, сортировка и пагинация выполняются в базе данных
+            # или по снимку справочника, если он включён и соответствует версии
+            # Число строк выборки одно для всех страниц: в режиме курсора
+            # COUNT не повторяется на каждой следующей странице
+            count_key = ('count', search, filter_key)
+            if after:
+                employees_paginated = paginate_employees_after(search, sort_field, sort_order, after, per_page,
+                                                               filters, results_cache.get(count_key, version))
+            else:
+                employees_paginated = None
+                if not filters:
+                    employees_paginated = snapshots.paginate(version, search, sort_field, sort_order, page, per_page)
+                if employees_paginated is None:
+                    employees_paginated = paginate_employees(search, sort_field, sort_order, page, per_page, filters)
+            results_cache.set(result_key, version, detach_items(employees_paginated))
+            results_cache.set(count_key, version, employees_paginated.total)
         
-        # Специальная обработка для разных типов данных
-        if sort_field == 'hire_date':
-            all_employees.sort(key=lambda x: getattr(x, sort_field), reverse=reverse)
-        elif sort_field == 'on_probation':
-            all_employees.sort(key=lambda x: str(getattr(x, sort_field)), reverse=reverse)
-        else:
-            all_employees.sort(key=lambda x: getattr(x, sort_field).lower() if getattr(x, sort_field) else '', reverse=reverse)
+        # Число сотрудников по значениям фильтров: одно на все страницы выборки
+        facets_key = ('facets', search, filter_key, is_authenticated)
+        facets = results_cache.get(facets_key, version)
+        if facets is None:
+            facets = facet_counts(search, filters, FACETS if is_authenticated else PUBLIC_FACETS)
+            results_cache.set(facets_key, version, facets)
+        
+        content = Markup(render_template('employees_list.html', 
+                                         employees=employees_paginated,
+                                         search=search,
+                                         sort_field=sort_field,
+                                         sort_order=sort_order,
+                                         filters=filter_args(filters),
+                                         facets=facets,
+                                         is_authenticated=is_authenticated,
+                                         is_hr=is_hr))
+        pages_cache.set(page_key, version, content)
     
-    # Пагинация вручную
-    total = len(all_employees)
-    start = (page - 1) * per_page
-    end = start + per_page
-    employees_page = all_employees[start:end]
+    response = make_response(render_template('employees.html', content=content, is_hr=is_hr,
+                                             batch_actions=BATCH_ACTIONS))
+    if etag:
+        # Слабый тег: разметка та же, даже если ответ потом будет сжат
+        response.set_etag(etag, weak=True)
+        response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.route('/employees/batch', methods=['POST'])
+@rate_limiter.limit(WRITE_LIMITS)
+def batch_employees():
+    if 'user_id' not in session or not session.get('is_hr'):
+        flash('Требуются права кадровика', 'error')
+        return redirect(url_for('login'))
+    if not valid_csrf_token(request.form.get('csrf_token')):
+        abort(400)
     
-    # Создаем объект пагинации вручную
-    class Pagination:
-        def __init__(self, items, page, per_page, total):
-            self.items = items
-            self.page = page
-            self.per_page = per_page
-            self.total = total
-            self.pages = (total + per_page - 1) // per_page if per_page > 0 else 1
-            
-        @property
-        def has_prev(self):
-            return self.page > 1
-            
-        @property
-        def has_next(self):
-            return self.page < self.pages
-            
-        @property
-        def prev_num(self):
-            return self.page - 1
-            
-        @property
-        def next_num(self):
-            return self.page + 1
+    # Возврат на ту же страницу списка, с которой отправлена форма
+    next_url = request.form.get('next', '')
+    if not next_url.startswith('/employees'):
+        next_url = url_for('employees')
     
-    employees_paginated = Pagination(employees_page, page, per_page, total)
+    action = request.form.get('action')
+    ids = request.form.getlist('ids', type=int)
+    position = request.form.get('position', '').strip()
+    if action not in BATCH_ACTIONS:
+        flash('Выберите действие', 'error')
+        return redirect(next_url)
+    if not ids:
+        flash('Не выбраны сотрудники', 'error')
+        return redirect(next_url)
+    if action == 'set_position' and not position:
+        flash('Должность не может быть пустой', 'error')
+        return redirect(next_url)
+    if len(position) > 100:
+        flash('Название должности не должно превышать 100 символов', 'error')
+        return redirect(next_url)
     
-    return render_template('employees.html', 
-                         employees=employees_paginated,
-                         search=search,
-                         sort_field=sort_field,
-                         sort_order=sort_order,
-                         is_authenticated='user_id' in session,
-                         is_hr=session.get('is_hr', False))
+    try:
+        count = run_batch(db.session.connection(), action, ids, position)
+        db.session.commit()
+        done = 'Удалено' if action == 'delete' else 'Изменено'
+        flash(f'{done} сотрудников: {count}', 'success')
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Ошибка при изменении сотрудников: {str(e)}', 'error')
+    return redirect(next_url)
+
+@app.route('/employees/suggest')
+def suggest_employees():
+    # Подсказки для строки поиска: ФИО и должности видны и гостям
+    query = request.args.get('q', '')[:100]
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    return jsonify({'query': query, 'suggestions': typeahead.suggest(query, limit)})
+
+@app.route('/employees/cache_stats')
+def employees_cache_stats():
+    if 'user_id' not in session or not session.get('is_hr'):
+        return jsonify({'error': 'Требуются права кадровика'}), 403
+    return jsonify({'results': results_cache.stats(), 'pages': pages_cache.stats(),
+                    'data_version': get_data_version()})
+
+@app.route('/employees/export')
+def export_employees():
+    export_format = request.args.get('format', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        abort(400)
+    search = request.args.get('search', '')
+    sort_field = request.args.get('sort', 'id')
+    sort_order = request.args.get('order', 'asc')
+    fields = EXPORT_FIELDS if 'user_id' in session else PUBLIC_FIELDS
+    filters = parse_filters(request.args, FILTER_FIELDS if 'user_id' in session else PUBLIC_FILTERS)
+    
+    # Ответ формируется генератором: первые байты уходят сразу,
+    # а память не зависит от размера справочника
+    rows = iter_export(export_format, search, sort_field, sort_order, fields, filters)
+    return Response(stream_with_context(rows),
+                    content_type=EXPORT_FORMATS[export_format],
+                    headers={'Content-Disposition': f'attachment; filename=employees.{export_format}'})
+
+@app.route('/stats')
+def stats():
+    if 'user_id' not in session:
+        flash('Войдите в систему для просмотра статистики', 'error')
+        return redirect(url_for('login'))
+    return render_template('stats.html', stats=read_stats())
+
+@app.route('/stats.json')
+def stats_json():
+    if 'user_id' not in session:
+        return jsonify({'error': 'Требуется вход в систему'}), 401
+    return jsonify(read_stats())
+
+@app.route('/engine_stats')
+def engine_stats():
+    if 'user_id' not in session or not session.get('is_hr'):
+        return jsonify({'error': 'Требуются права кадровика'}), 403
+    return jsonify({'pool': engine_profile.pool_stats(db.engine), 'sqlite_pragmas': engine_profile.pragmas})
+
+def read_employee_form():
+    # Поля формы без пробелов по краям: проверяются, сохраняются и попадают
+    # в ключи уникальности одни и те же значения, как в api.read_payload
+    return {field: request.form.get(field, '').strip() for field in IMPORT_FIELDS}
 
 @app.route('/add_employee', methods=['GET', 'POST'])
+@rate_limiter.limit(WRITE_LIMITS)
 def add_employee():
     if 'user_id' not in session or not session.get('is_hr'):
         flash('Требуются права кадровика', 'error')
         return redirect(url_for('login'))
     
     if request.method == 'POST':
-        errors = validate_employee_data(request.form)
+        form = read_employee_form()
+        errors, hire_date = check_employee_data(form)
+        if not errors:
+            errors = duplicate_errors(form)
         if errors:
             for error in errors:
                 flash(error, 'error')
@@ -423,24 +435,71 @@ def add_employee():
         
         try:
             employee = Employee(
-                full_name=request.form['full_name'],
-                position=request.form['position'],
-                gender=request.form['gender'],
-                phone=request.form['phone'],
-                email=request.form['email'],
+                full_name=form['full_name'],
+                position=form['position'],
+                gender=form['gender'],
+                phone=form['phone'],
+                email=form['email'],
                 on_probation='on_probation' in request.form,
-                hire_date=datetime.strptime(request.form['hire_date'], '%Y-%m-%d')
+                hire_date=hire_date
             )
             db.session.add(employee)
             db.session.commit()
             flash('Сотрудник успешно добавлен', 'success')
             return redirect(url_for('employees'))
         except Exception as e:
+            db.session.rollback()
             flash(f'Ошибка при добавлении сотрудника: {str(e)}', 'error')
     
     return render_template('edit_employee.html')
 
+@app.route('/employees/import', methods=['GET', 'POST'])
+@rate_limiter.limit(WRITE_LIMITS)
+def import_employees():
+    if 'user_id' not in session or not session.get('is_hr'):
+        if request.is_json:
+            return jsonify({'error': 'Требуются права кадровика'}), 403
+        flash('Требуются права кадровика', 'error')
+        return redirect(url_for('login'))
+    
+    if request.method == 'POST':
+        chunk_size = request.args.get('chunk_size', app.config['IMPORT_CHUNK_SIZE'], type=int)
+        chunk_size = max(chunk_size, 1)
+        
+        # JSON-запрос: список сотрудников в теле, отчет тоже в JSON
+        if request.is_json:
+            try:
+                rows = read_json_rows(request.get_json(silent=True))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            try:
+                report = import_employee_rows(rows, chunk_size)
+            except Exception as e:
+                return jsonify({'error': f'Ошибка при импорте сотрудников: {str(e)}'}), 500
+            return jsonify(report)
+        
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            flash('Выберите CSV-файл для импорта', 'error')
+            return render_template('import_employees.html')
+        
+        try:
+            report = import_employee_rows(read_csv_rows(upload.stream), chunk_size)
+        except (UnicodeDecodeError, ValueError) as e:
+            flash(f'Не удалось прочитать файл: {str(e)}', 'error')
+            return render_template('import_employees.html')
+        except Exception as e:
+            flash(f'Ошибка при импорте сотрудников: {str(e)}', 'error')
+            return render_template('import_employees.html')
+        
+        if report['imported']:
+            flash(f"Импортировано сотрудников: {report['imported']}", 'success')
+        return render_template('import_employees.html', report=report)
+    
+    return render_template('import_employees.html')
+
 @app.route('/edit_employee/<int:employee_id>', methods=['GET', 'POST'])
+@rate_limiter.limit(WRITE_LIMITS)
 def edit_employee(employee_id):
     if 'user_id' not in session or not session.get('is_hr'):
         flash('Требуются права кадровика', 'error')
@@ -449,30 +508,36 @@ def edit_employee(employee_id):
     employee = Employee.query.get_or_404(employee_id)
     
     if request.method == 'POST':
-        errors = validate_employee_data(request.form)
+        form = read_employee_form()
+        errors, hire_date = check_employee_data(form)
+        if not errors:
+            errors = duplicate_errors(form, exclude_id=employee.id)
         if errors:
             for error in errors:
                 flash(error, 'error')
             return render_template('edit_employee.html', employee=employee)
         
         try:
-            employee.full_name = request.form['full_name']
-            employee.position = request.form['position']
-            employee.gender = request.form['gender']
-            employee.phone = request.form['phone']
-            employee.email = request.form['email']
+            employee.full_name = form['full_name']
+            employee.position = form['position']
+            employee.gender = form['gender']
+            employee.phone = form['phone']
+            employee.email = form['email']
             employee.on_probation = 'on_probation' in request.form
-            employee.hire_date = datetime.strptime(request.form['hire_date'], '%Y-%m-%d')
+            employee.hire_date = hire_date
             
             db.session.commit()
             flash('Данные сотрудника обновлены', 'success')
             return redirect(url_for('employees'))
         except Exception as e:
+            db.session.rollback()
             flash(f'Ошибка при обновлении данных: {str(e)}', 'error')
     
     return render_template('edit_employee.html', employee=employee)
 
 @app.route('/delete_employee/<int:employee_id>')
+# Удаление выполняется по ссылке (GET), поэтому лимит — на любой метод
+@rate_limiter.limit(WRITE_LIMITS, methods=None)
 def delete_employee(employee_id):
     if 'user_id' not in session or not session.get('is_hr'):
         flash('Требуются права кадровика', 'error')
@@ -485,68 +550,10 @@ def delete_employee(employee_id):
     return redirect(url_for('employees'))
 
 def init_db():
-    with app.app_context():
-        try:
-            # Создаем все таблицы
-            db.create_all()
-            print("✅ Таблицы базы данных созданы")
-            
-            # Создаем или обновляем администратора (нельзя удалить через интерфейс)
-            admin_user = User.query.filter_by(login='admin').first()
-            if not admin_user:
-                admin_user = User(login='admin', is_hr=True)
-                admin_user.set_password('admin123')
-                db.session.add(admin_user)
-                print("✅ Создан администратор (логин: admin, пароль: admin123)")
-            else:
-                # Обновляем права на случай, если админ был изменен
-                admin_user.is_hr = True
-                print("✅ Администратор уже существует, права обновлены")
-            
-            # Проверяем, есть ли уже другие пользователи кроме админа
-            if User.query.filter(User.login != 'admin').count() == 0:
-                # Создаем тестовых пользователей (кадровиков)
-                angelina = User(login='angelkuz', is_hr=True)
-                angelina.set_password('02042004')
-                db.session.add(angelina)
-                
-                # Добавляем обычных пользователей без прав кадровика
-                user1 = User(login='user1', is_hr=False)
-                user1.set_password('user123')
-                db.session.add(user1)
-                
-                test_user = User(login='test', is_hr=False)
-                test_user.set_password('test123')
-                db.session.add(test_user)
-                
-                db.session.commit()
-                print("✅ Созданы тестовые пользователи")
-            else:
-                db.session.commit()
-                print("✅ Пользователи уже существуют в базе")
-            
-            # Создаем тестовых сотрудников из фиксированного списка
-            if Employee.query.count() == 0:
-                employees_data = get_employees_data()
-                for data in employees_data:
-                    employee = Employee(
-                        full_name=data['full_name'],
-                        position=data['position'],
-                        gender=data['gender'],
-                        phone=data['phone'],
-                        email=data['email'],
-                        on_probation=data['on_probation'],
-                        hire_date=datetime.strptime(data['hire_date'], '%Y-%m-%d')
-                    )
-                    db.session.add(employee)
-                db.session.commit()
-                print(f"✅ Создано {len(employees_data)} тестовых сотрудников")
-            else:
-                print(f"✅ В базе уже есть {Employee.query.count()} сотрудников")
-                
-        except Exception as e:
-            print(f"❌ Ошибка при инициализации базы данных: {e}")
-            db.session.rollback()
+    # Создание схемы и начальные данные (см. bootstrap.py). При запуске
+    # воркеров вызывается ensure_schema, которая только сверяет версию схемы
+    from bootstrap import bootstrap
+    bootstrap(app)
 
 if __name__ == '__main__':
     init_db()
@@ -0,0 +1,225 @@
+from flask import current_app, request, url_for, send_from_directory, redirect, abort
+from werkzeug.security import safe_join
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Статические файлы под адресами с хешем содержимого: main.css -> /assets/main.3f2a1b9c0d4e.css.
+# Адрес меняется вместе с файлом, поэтому браузер может хранить его сколько угодно
+# и не переспрашивать сервер.
+#
+# build_assets.py при развёртывании кладёт в ASSETS_BUILD_DIR уменьшенные копии
+# файлов и их сжатые варианты (.gz, .br) на максимальном уровне. /assets отдаёт
+# тот вариант, который принимает браузер, и ничего не сжимает на лету.
+# В manifest.json записан хеш исходника каждой копии: если исходник изменился,
+# а сборку не повторили, отдаётся сам исходник.
+
+FINGERPRINT_LENGTH = 12
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Файлы, которые имеет смысл сжимать; остальные (картинки) уже сжаты
+BUILD_EXTENSIONS = ('.css', '.js', '.svg', '.ico', '.txt')
+MANIFEST = 'manifest.json'
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+def minify_css(text):
+    # Убирает комментарии, переводы строк и пробелы вокруг { } ; , >
+    # Строки в кавычках не меняются
+    strings = r'("(?:[^"\\]|\\.)*"|\'(?:[^\'\\]|\\.)*\')'
+    text = re.sub(strings + r'|/\*.*?\*/', lambda match: match.group(1) or '', text, flags=re.S)
+    parts = re.split(strings, text)
+    result = []
+    for index, part in enumerate(parts):
+        if index % 2:
+            result.append(part)
+            continue
+        part = re.sub(r'\s+', ' ', part)
+        part = re.sub(r' ?([{};,>]) ?', r'\1', part)
+        part = part.replace(': ', ':')
+        part = part.replace(';}', '}')
+        result.append(part)
+    return ''.join(result).strip()
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def directory_digest(*paths):
+    # Общий хеш содержимого каталогов — меняется при каждом изменении шаблонов
+    # или статики, подходит как номер выпуска для ETag страниц
+    digest = hashlib.sha256()
+    for root_path in paths:
+        for root, dirs, files in os.walk(root_path):
+            dirs.sort()
+            for name in sorted(files):
+                path = os.path.join(root, name)
+                digest.update(os.path.relpath(path, root_path).encode('utf-8'))
+                digest.update(file_digest(path).encode('ascii'))
+    return digest.hexdigest()[:FINGERPRINT_LENGTH]
+
+def split_fingerprint(filename):
+    # main.3f2a1b9c0d4e.css -> ('main.css', '3f2a1b9c0d4e')
+    base, ext = os.path.splitext(filename)
+    original, _, fingerprint = base.rpartition('.')
+    if not original or len(fingerprint) != FINGERPRINT_LENGTH:
+        return None, None
+    return original + ext, fingerprint
+
+class Assets:
+    def __init__(self):
+        self.static_folder = None
+        self.build_dir = None
+        self._fingerprints = {}
+        self._manifest = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('ASSETS_BUILD_DIR', os.getenv('ASSETS_BUILD_DIR') or os.path.join(app.instance_path, 'assets'))
+        self.static_folder = app.static_folder
+        self.build_dir = app.config['ASSETS_BUILD_DIR']
+        app.add_url_rule('/assets/<path:filename>', 'assets', self.send)
+        app.jinja_env.globals['asset_url'] = self.url
+        app.extensions['assets'] = self
+
+    def fingerprint(self, filename):
+        path = safe_join(self.static_folder, filename)
+        if path is None:
+            raise FileNotFoundError(filename)
+        cached = self._fingerprints.get(filename)
+        # В режиме отладки файл перечитывается, если изменился на диске
+        if cached is not None and not current_app.debug:
+            return cached[1]
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        fingerprint = file_digest(path)[:FINGERPRINT_LENGTH]
+        with self._lock:
+            self._fingerprints[filename] = (signature, fingerprint)
+        return fingerprint
+
+    def fingerprinted_name(self, filename):
+        base, ext = os.path.splitext(filename)
+        return f'{base}.{self.fingerprint(filename)}{ext}'
+
+    def url(self, filename):
+        try:
+            return url_for('assets', filename=self.fingerprinted_name(filename))
+        except OSError:
+            return url_for('static', filename=filename)
+
+    def send(self, filename):
+        original, fingerprint = split_fingerprint(filename)
+        if original is None:
+            abort(404)
+        try:
+            current = self.fingerprint(original)
+        except OSError:
+            abort(404)
+        if fingerprint != current:
+            # Старый адрес из закэшированной страницы: отдавать по нему новое
+            # содержимое нельзя, иначе оно навсегда осядет в кэше под старым хешем
+            response = redirect(self.url(original))
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        built = self.manifest().get(original)
+        if built is not None and built['source'] == current:
+            response = self.send_built(original, built['encodings'])
+        else:
+            response = send_from_directory(self.static_folder, original, max_age=IMMUTABLE_MAX_AGE)
+        response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        return response
+
+    def manifest(self):
+        # {исходный файл: {'source': хеш исходника, 'encodings': [...]}}.
+        # Перечитывается, когда файл изменился на диске: сборку можно
+        # выполнить и после запуска воркеров
+        path = os.path.join(self.build_dir, MANIFEST)
+        try:
+            stat = os.stat(path)
+            signature = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            signature = None
+        cached = self._manifest
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        manifest = {}
+        if signature is not None:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError):
+                manifest = {}
+        self._manifest = (signature, manifest)
+        return manifest
+
+    def send_built(self, original, encodings):
+        encoding = request.accept_encodings.best_match(encodings)
+        filename = original + ENCODING_SUFFIXES[encoding] if encoding else original
+        # Тип — по исходному имени, а не по .gz/.br
+        response = send_from_directory(self.build_dir, filename, max_age=IMMUTABLE_MAX_AGE,
+                                       mimetype=mimetypes.guess_type(original)[0])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        return response
+
+def write_file(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def build_assets(static_folder, build_dir):
+    # Уменьшенные и сжатые копии статики; возвращает
+    # [(файл, размер исходника, {вариант: размер})]
+    manifest = {}
+    built = []
+    for root, dirs, files in os.walk(static_folder):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(BUILD_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                source = f.read()
+            data = source
+            if name.endswith('.css'):
+                data = minify_css(source.decode('utf-8')).encode('utf-8')
+            target = os.path.join(build_dir, filename)
+            write_file(target, data)
+            sizes = {'identity': len(data)}
+            variants = {'gzip': gzip.compress(data, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                variants['br'] = brotli.compress(data, quality=11)
+            encodings = []
+            # Сервер предпочитает brotli: он в списке первым
+            for encoding in ('br', 'gzip'):
+                compressed = variants.get(encoding)
+                if compressed is None or len(compressed) >= len(data):
+                    continue
+                write_file(target + ENCODING_SUFFIXES[encoding], compressed)
+                encodings.append(encoding)
+                sizes[encoding] = len(compressed)
+            manifest[filename] = {'source': hashlib.sha256(source).hexdigest()[:FINGERPRINT_LENGTH],
+                                  'encodings': encodings}
+            built.append((filename, len(source), sizes))
+    write_file(os.path.join(build_dir, MANIFEST),
+               json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    return built
+
+assets = Assets()
@@ -0,0 +1,269 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Нагрузочный тест маршрутов приложения на локальной SQLite через тестовый клиент Flask.
+# Для каждого размера справочника запускается отдельный процесс: так пиковая
+# память (RSS) одного размера не смешивается с другими.
+#
+#   python benchmarks/bench_routes.py --sizes 100,10000 --output results.json
+#   python benchmarks/bench_routes.py --output new.json --compare results.json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+DEFAULT_SIZES = [100, 10000, 100000, 1000000]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def peak_rss_mb():
+    # ru_maxrss в Linux — в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def summarize(size, name, durations, statuses, elapsed):
+    durations = sorted(durations)
+    return {
+        'size': size,
+        'scenario': name,
+        'requests': len(durations),
+        'p50_ms': round(percentile(durations, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(durations, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(durations, 0.99) * 1000, 3),
+        'mean_ms': round(sum(durations) / len(durations) * 1000, 3),
+        'throughput_rps': round(len(durations) / elapsed, 2) if elapsed else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'statuses': statuses,
+    }
+
+def run_scenario(size, name, make_request, requests, max_seconds, warmup=0):
+    # make_request(i) выполняет один запрос и возвращает код ответа;
+    # первые warmup запросов не учитываются (компиляция шаблонов, прогрев кэша)
+    for i in range(warmup):
+        make_request(i)
+    durations = []
+    statuses = {}
+    started = time.perf_counter()
+    for i in range(requests):
+        request_started = time.perf_counter()
+        status = make_request(i)
+        durations.append(time.perf_counter() - request_started)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        if time.perf_counter() - started > max_seconds:
+            break
+    return summarize(size, name, durations, statuses, time.perf_counter() - started)
+
+def schema_version():
+    sys.path.insert(0, ROOT)
+    from bootstrap import SCHEMA_VERSION
+    return SCHEMA_VERSION
+
+def prepare_database(size, seed):
+    # Базы кэшируются по размеру, seed и версии схемы: заполнение 1M строк
+    # занимает десятки секунд, а база старой схемы приложению не подходит
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = os.path.join(DATA_DIR, f'employees_{size}_{seed}_v{schema_version()}.db')
+    if not os.path.exists(path):
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}')
+        subprocess.run([sys.executable, os.path.join(ROOT, 'seed_db.py'), str(size), '--seed', str(seed), '--reset'],
+                       env=env, check=True, stdout=subprocess.DEVNULL)
+    return path
+
+def copy_database(source, path):
+    # База заполняется в режиме WAL, и часть строк может лежать в файле -wal:
+    # копия делается средствами SQLite, а не копированием одного файла
+    source_connection = sqlite3.connect(source)
+    target_connection = sqlite3.connect(path)
+    try:
+        source_connection.backup(target_connection)
+    finally:
+        target_connection.close()
+        source_connection.close()
+
+def read_scenarios(guest, client, size):
+    # Имя сценария -> функция одного запроса
+    per_page = 20
+    last_page = max(1, (size + per_page - 1) // per_page)
+    items = {
+        'employees_guest': lambda i: guest.get('/employees').status_code,
+        'employees': lambda i: client.get('/employees').status_code,
+        'employees_search': lambda i: client.get('/employees?search=ванов').status_code,
+        'employees_search_short': lambda i: client.get('/employees?search=ив').status_code,
+        'employees_search_rare': lambda i: client.get('/employees?search=ахматова').status_code,
+        'employees_deep_page': lambda i: client.get(f'/employees?page={last_page}').status_code,
+        'employees_deep_page_sorted': lambda i: client.get(f'/employees?sort=full_name&page={last_page}').status_code,
+    }
+    for field in ['full_name', 'position', 'gender', 'phone', 'email', 'hire_date', 'on_probation']:
+        for order in ['asc', 'desc']:
+            items[f'employees_sort_{field}_{order}'] = (
+                lambda i, field=field, order=order:
+                    client.get(f'/employees?sort={field}&order={order}&page=2').status_code)
+    return items
+
+def write_scenarios(client, size, employee_ids, created):
+    def add(i):
+        response = client.post('/add_employee', data={
+            'full_name': 'Нагрузочный Тест Тестович', 'position': 'Тестировщик', 'gender': 'male',
+            'phone': f'+8 800 {i:07d}', 'email': f'bench{i}@bench.example',
+            'hire_date': '2024-05-01'})
+        return response.status_code
+
+    def edit(i):
+        employee_id = employee_ids[i % len(employee_ids)]
+        response = client.post(f'/edit_employee/{employee_id}', data={
+            'full_name': 'Изменённый Сотрудник', 'position': f'Должность {i}', 'gender': 'female',
+            'phone': f'+8 801 {i:07d}', 'email': f'edited{i}@bench.example', 'hire_date': '2023-01-01',
+            'on_probation': 'on'})
+        return response.status_code
+
+    def delete(i):
+        if i >= len(created):
+            return 'skipped'
+        return client.get(f'/delete_employee/{created[i]}').status_code
+
+    return {'add_employee': add, 'edit_employee': edit, 'delete_employee': delete}
+
+def run_size(size, seed, requests, max_seconds, warmup):
+    source = prepare_database(size, seed)
+    workdir = tempfile.mkdtemp(prefix='bench_')
+    path = os.path.join(workdir, 'employees.db')
+    # Работаем с копией: сценарии записи не должны портить кэшированную базу
+    copy_database(source, path)
+    os.environ['DATABASE_URL'] = f'sqlite:///{path}'
+    # Сценарии входа и записи измеряют сами маршруты, а не ответы 429
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+    # Служебные файлы приложения — во временном каталоге, а не в instance/ репозитория
+    os.environ.setdefault('RATE_LIMIT_DB', os.path.join(workdir, 'rate_limit.db'))
+    os.environ.setdefault('SNAPSHOT_DIR', os.path.join(workdir, 'snapshots'))
+    os.environ.setdefault('ASSETS_BUILD_DIR', os.path.join(workdir, 'assets'))
+    sys.path.insert(0, ROOT)
+    try:
+        from app import app
+        app.config['TESTING'] = True
+        results = []
+        guest = app.test_client()
+        client = app.test_client()
+        client.post('/login', data={'login': 'admin', 'password': 'admin123'})
+
+        connection = sqlite3.connect(path)
+        employee_ids = [row[0] for row in connection.execute(
+            'SELECT id FROM employees ORDER BY id LIMIT 1000')]
+        last_id = connection.execute('SELECT max(id) FROM employees').fetchone()[0] or 0
+        connection.close()
+
+        for name, make_request in read_scenarios(guest, client, size).items():
+            results.append(run_scenario(size, name, make_request, requests, max_seconds, warmup))
+
+        # Вход: каждый запрос проверяет пароль
+        results.append(run_scenario(size, 'login', lambda i: guest.post(
+            '/login', data={'login': 'admin', 'password': 'admin123'}).status_code, requests, max_seconds))
+
+        writes = write_scenarios(client, size, employee_ids, [])
+        results.append(run_scenario(size, 'add_employee', writes['add_employee'], requests, max_seconds))
+        connection = sqlite3.connect(path)
+        created = [row[0] for row in connection.execute(
+            'SELECT id FROM employees WHERE id > ? ORDER BY id', (last_id,))]
+        connection.close()
+        writes = write_scenarios(client, size, employee_ids, created)
+        results.append(run_scenario(size, 'edit_employee', writes['edit_employee'], requests, max_seconds))
+        results.append(run_scenario(size, 'delete_employee', writes['delete_employee'],
+                                    min(requests, len(created)) or 1, max_seconds))
+        return results
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+def compare(current, baseline_path, threshold):
+    # Печатает сценарии, у которых p50 или p95 изменились больше порога
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['size'], r['scenario']): r for r in json.load(f)['results']}
+    regressions = 0
+    for result in current['results']:
+        old = baseline.get((result['size'], result['scenario']))
+        if not old:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            if not old[metric]:
+                continue
+            change = (result[metric] - old[metric]) / old[metric]
+            if abs(change) >= threshold:
+                mark = 'медленнее' if change > 0 else 'быстрее'
+                regressions += change > 0
+                print(f"{result['size']:>8} {result['scenario']:<36} {metric}: "
+                      f"{old[metric]:.2f} -> {result[metric]:.2f} мс ({change:+.0%}, {mark})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный тест маршрутов приложения')
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='размеры справочника через запятую')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help='запросов на сценарий')
+    parser.add_argument('--max-seconds', type=float, default=30, help='ограничение времени на сценарий')
+    parser.add_argument('--warmup', type=int, default=3, help='неучитываемых запросов перед сценарием чтения')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--compare', help='JSON предыдущего запуска для сравнения')
+    parser.add_argument('--threshold', type=float, default=0.1, help='порог изменения для сравнения')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        # Дочерний процесс: один размер, результаты — в stdout
+        results = run_size(args.worker, args.seed, args.requests, args.max_seconds, args.warmup)
+        print(json.dumps(results, ensure_ascii=False))
+        return
+
+    report = {'meta': metadata(), 'results': []}
+    for size in [int(value) for value in args.sizes.split(',') if value]:
+        print(f"Размер {size}...", file=sys.stderr)
+        prepare_database(size, args.seed)
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--worker', str(size), '--seed', str(args.seed),
+             '--requests', str(args.requests), '--max-seconds', str(args.max_seconds),
+             '--warmup', str(args.warmup)],
+            capture_output=True, text=True, check=True)
+        results = json.loads(completed.stdout.strip().splitlines()[-1])
+        for result in results:
+            print(f"{size:>8} {result['scenario']:<36} p50 {result['p50_ms']:>9.2f} мс  "
+                  f"p95 {result['p95_ms']:>9.2f} мс  p99 {result['p99_ms']:>9.2f} мс  "
+                  f"{result['throughput_rps']:>8} зап/с  RSS {result['peak_rss_mb']} МБ", file=sys.stderr)
+        report['results'].extend(results)
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.threshold)
+        sys.exit(1 if regressions else 0)
+
+if __name__ == '__main__':
+    main()
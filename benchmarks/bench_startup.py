@@ -0,0 +1,80 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import shutil
+
+# Время запуска воркера: импорт приложения, проверка схемы базы и первый запрос.
+# Каждый запуск — отдельный процесс, как при старте воркера сервера.
+#
+#   python benchmarks/bench_startup.py --runs 20 --output startup.json
+#   python benchmarks/bench_startup.py --compare startup.json
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WORKER = """
+import sys, time, json
+started = time.perf_counter()
+sys.path.insert(0, {root!r})
+from app import app
+imported = time.perf_counter()
+from bootstrap import ensure_schema
+ensure_schema(app)
+checked = time.perf_counter()
+status = app.test_client().get('/employees').status_code
+finished = time.perf_counter()
+print(json.dumps({{'import_ms': (imported - started) * 1000, 'schema_check_ms': (checked - imported) * 1000,
+                  'first_request_ms': (finished - checked) * 1000, 'status': status}}))
+"""
+
+def run_once(env):
+    completed = subprocess.run([sys.executable, '-c', WORKER.format(root=ROOT)], env=env,
+                               capture_output=True, text=True, check=True)
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def summarize(samples, metric):
+    values = sorted(sample[metric] for sample in samples)
+    return {
+        'p50_ms': round(statistics.median(values), 2),
+        'p95_ms': round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        'min_ms': round(values[0], 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Время запуска воркера приложения')
+    parser.add_argument('--runs', type=int, default=10, help='число запусков')
+    parser.add_argument('--output', help='файл для результатов в JSON')
+    parser.add_argument('--compare', help='JSON предыдущего запуска для сравнения')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_startup_')
+    try:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'employees.db')}")
+        # База создаётся заранее, как при развёртывании
+        subprocess.run([sys.executable, os.path.join(ROOT, 'bootstrap.py')], env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+        samples = [run_once(env) for _ in range(args.runs)]
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {metric: summarize(samples, metric) for metric in ('import_ms', 'schema_check_ms', 'first_request_ms')}
+    for metric, values in report.items():
+        print(f"{metric:<18} p50 {values['p50_ms']:>8.2f} мс  p95 {values['p95_ms']:>8.2f} мс", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        for metric, values in report.items():
+            old = baseline.get(metric, {}).get('p50_ms')
+            if old:
+                print(f"{metric:<18} {old:.2f} -> {values['p50_ms']:.2f} мс ({(values['p50_ms'] - old) / old:+.0%})")
+
+if __name__ == '__main__':
+    main()
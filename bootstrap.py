@@ -0,0 +1,160 @@
+from sqlalchemy import select, update, insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateTable
+from models import db, User, Employee, SchemaVersion
+from schema import upgrade_schema
+from search_index import create_search_index, rebuild_search_index
+from employee_stats import ensure_stats
+from employee_changes import ensure_change_log
+from probation import remove_legacy_lease
+from datetime import datetime, date
+import json
+import os
+import sys
+
+# Создание и обновление структуры базы и начальные данные. Выполняется один раз
+# при развёртывании (python bootstrap.py), а не при запуске каждого воркера:
+# воркер только сверяет номер версии схемы одним запросом (ensure_schema).
+
+# Увеличивается при каждом изменении структуры, которое должен выполнить migrate()
+SCHEMA_VERSION = 5
+
+SAMPLE_EMPLOYEES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'employees.json')
+
+def current_schema_version(connection):
+    try:
+        return connection.execute(select(SchemaVersion.version).where(SchemaVersion.id == 1)).scalar()
+    except DBAPIError:
+        # Таблицы ещё нет: база не создавалась или создана до появления версий
+        return None
+
+def migrate(connection):
+    # Первая запись в транзакции берёт блокировку на запись: если миграцию
+    # одновременно запустят несколько процессов, остальные дождутся первого
+    # и увидят уже новую версию
+    table = SchemaVersion.__table__
+    connection.execute(CreateTable(table, if_not_exists=True))
+    connection.execute(update(table).values(version=table.c.version))
+    version = current_schema_version(connection)
+    if version is not None and version >= SCHEMA_VERSION:
+        return False
+
+    db.metadata.create_all(bind=connection)
+    print("✅ Таблицы базы данных созданы")
+    
+    # Новые столбцы и индексы для базы, созданной предыдущей версией
+    upgrade_schema(connection)
+    
+    # Поисковый индекс для базы, созданной до его появления
+    if create_search_index(connection):
+        rebuild_search_index(connection)
+        print("✅ Построен поисковый индекс сотрудников")
+    
+    # Сводная статистика для базы, созданной до её появления
+    if ensure_stats(connection):
+        print("✅ Посчитана статистика сотрудников")
+    
+    # Журнал изменений для базы, созданной до его появления
+    if ensure_change_log(connection):
+        print("✅ Сотрудники добавлены в журнал изменений")
+    
+    # Время запуска снятия испытательного срока переехало в sweep_state
+    remove_legacy_lease(connection)
+    
+    if version is None:
+        connection.execute(insert(table).values(id=1, version=SCHEMA_VERSION, applied_at=datetime.utcnow()))
+    else:
+        connection.execute(update(table).values(version=SCHEMA_VERSION, applied_at=datetime.utcnow()))
+    print(f"✅ Версия схемы базы данных: {SCHEMA_VERSION}")
+    return True
+
+def seed_users():
+    # Создаем или обновляем администратора (нельзя удалить через интерфейс)
+    admin_user = User.query.filter_by(login='admin').first()
+    if not admin_user:
+        admin_user = User(login='admin', is_hr=True)
+        admin_user.set_password('admin123')
+        db.session.add(admin_user)
+        print("✅ Создан администратор (логин: admin, пароль: admin123)")
+    else:
+        # Обновляем права на случай, если админ был изменен
+        admin_user.is_hr = True
+        print("✅ Администратор уже существует, права обновлены")
+    
+    # Проверяем, есть ли уже другие пользователи кроме админа
+    if User.query.filter(User.login != 'admin').count() == 0:
+        # Создаем тестовых пользователей (кадровиков)
+        angelina = User(login='angelkuz', is_hr=True)
+        angelina.set_password('02042004')
+        db.session.add(angelina)
+        
+        # Добавляем обычных пользователей без прав кадровика
+        user1 = User(login='user1', is_hr=False)
+        user1.set_password('user123')
+        db.session.add(user1)
+        
+        test_user = User(login='test', is_hr=False)
+        test_user.set_password('test123')
+        db.session.add(test_user)
+        
+        db.session.commit()
+        print("✅ Созданы тестовые пользователи")
+    else:
+        db.session.commit()
+        print("✅ Пользователи уже существуют в базе")
+
+def load_sample_employees(path=SAMPLE_EMPLOYEES_PATH):
+    # Фиксированный список сотрудников читается из файла только при заполнении базы
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def seed_sample_employees():
+    # Создаем тестовых сотрудников из фиксированного списка
+    if Employee.query.count() == 0:
+        employees_data = load_sample_employees()
+        for data in employees_data:
+            employee = Employee(
+                full_name=data['full_name'],
+                position=data['position'],
+                gender=data['gender'],
+                phone=data['phone'],
+                email=data['email'],
+                on_probation=data['on_probation'],
+                hire_date=date.fromisoformat(data['hire_date'])
+            )
+            db.session.add(employee)
+        db.session.commit()
+        print(f"✅ Создано {len(employees_data)} тестовых сотрудников")
+    else:
+        print(f"✅ В базе уже есть {Employee.query.count()} сотрудников")
+
+def bootstrap(app, sample_employees=True, seed=True):
+    # seed=False — начальные данные только вместе с миграцией: из нескольких
+    # одновременно запущенных воркеров их добавит тот, кто выполнил миграцию
+    with app.app_context():
+        try:
+            with db.engine.begin() as connection:
+                migrated = migrate(connection)
+            if seed or migrated:
+                seed_users()
+                if sample_employees:
+                    seed_sample_employees()
+            return True
+        except Exception as e:
+            print(f"❌ Ошибка при инициализации базы данных: {e}")
+            db.session.rollback()
+            return False
+
+def ensure_schema(app):
+    # Проверка при запуске воркера: один запрос, если база уже готова
+    with app.app_context():
+        with db.engine.connect() as connection:
+            version = current_schema_version(connection)
+    if version is not None and version >= SCHEMA_VERSION:
+        return True
+    print(f"⚠️ Версия схемы базы данных {version}, нужна {SCHEMA_VERSION}: выполняется bootstrap")
+    return bootstrap(app, seed=False)
+
+if __name__ == '__main__':
+    from app import app
+    sys.exit(0 if bootstrap(app, sample_employees='--no-sample-employees' not in sys.argv) else 1)
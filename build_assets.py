@@ -0,0 +1,18 @@
+from app import app
+from assets import build_assets, brotli
+
+def build():
+    # Уменьшенные и сжатые копии статики для /assets (см. assets.py).
+    # Запускается при развёртывании, после изменения файлов в static
+    build_dir = app.config['ASSETS_BUILD_DIR']
+    built = build_assets(app.static_folder, build_dir)
+    for filename, size, sizes in built:
+        variants = ', '.join(f'{encoding} {value} Б' for encoding, value in sizes.items())
+        print(f"✅ {filename}: {size} Б -> {variants}")
+    if brotli is None:
+        print("⚠️ Пакет brotli не установлен: собраны только варианты gzip")
+    print(f"✅ Собрано файлов: {len(built)} в {build_dir}")
+    return built
+
+if __name__ == '__main__':
+    build()
@@ -0,0 +1,31 @@
+from app import app
+from snapshot import snapshots
+import argparse
+import os
+import time
+
+def build():
+    # Собирает снимок справочника для текущей версии данных (см. snapshot.py).
+    # Запускается воркером при смене версии или вручную после развёртывания
+    with app.app_context():
+        started = time.perf_counter()
+        snapshot = snapshots.build()
+    if snapshot is None:
+        print("⚠️ Снимок уже строит другой процесс")
+        return None
+    elapsed = time.perf_counter() - started
+    print(f"✅ Снимок сотрудников: версия {snapshot.version}, строк {snapshot.count}, "
+          f"{snapshot.size / 2**20:.1f} МБ за {elapsed:.1f} с")
+    return snapshot
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Сборка снимка справочника сотрудников')
+    parser.add_argument('--delay', type=float, default=0,
+                        help='подождать секунд перед сборкой, чтобы учесть правки, идущие подряд')
+    args = parser.parse_args()
+    # Сборка не должна отнимать процессор у воркеров
+    if hasattr(os, 'nice'):
+        os.nice(10)
+    if args.delay > 0:
+        time.sleep(args.delay)
+    build()
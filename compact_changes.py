@@ -0,0 +1,21 @@
+from app import app, db
+from employee_changes import compact_changes, retention_cutoff, DEFAULT_RETENTION_DAYS
+import argparse
+import os
+
+def compact(days):
+    # Удаляет из журнала изменений записи старше days дней. Запускается
+    # по расписанию (cron); клиентам, отставшим сильнее, API ответит 410
+    with app.app_context():
+        with db.engine.begin() as connection:
+            deleted = compact_changes(connection, retention_cutoff(days))
+    print(f"✅ Удалено записей журнала изменений: {deleted}")
+    return deleted
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Удаление старых записей журнала изменений сотрудников')
+    parser.add_argument('--days', type=int,
+                        default=int(os.getenv('CHANGES_RETENTION_DAYS', DEFAULT_RETENTION_DAYS)),
+                        help=f'сколько дней хранить записи (по умолчанию {DEFAULT_RETENTION_DAYS})')
+    args = parser.parse_args()
+    compact(args.days)
@@ -0,0 +1,96 @@
+from flask import request
+import gzip
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Сжатие ответов: страницы, JSON и CSV уходят в gzip или brotli (если установлен
+# пакет brotli и браузер его принимает). Сжимаются только текстовые типы из
+# списка и только ответы больше порога — короткие ответы сжатие не уменьшит.
+# Потоковые ответы (выгрузка, файлы) не трогаются: статика из /assets уже
+# лежит сжатой после build_assets.py, а выгрузка отдаётся по частям.
+
+COMPRESS_MIMETYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/json', 'application/javascript', 'application/x-ndjson', 'image/svg+xml',
+}
+DEFAULT_MIN_SIZE = 500
+# Уровни для ответов, которые сжимаются на каждом запросе: почти тот же
+# размер, что и на максимальных уровнях, но в разы быстрее
+DEFAULT_GZIP_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 4
+
+def available_encodings():
+    # В порядке предпочтения сервера
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+def compress(data, encoding, level):
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+class Compression:
+    def __init__(self):
+        self.enabled = True
+        self.min_size = DEFAULT_MIN_SIZE
+        self.levels = {'gzip': DEFAULT_GZIP_LEVEL, 'br': DEFAULT_BROTLI_QUALITY}
+        self.encodings = available_encodings()
+        self.compressed = {}
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('COMPRESS_ENABLED', os.getenv('COMPRESS_ENABLED', '1').lower() in ('1', 'true', 'yes', 'on'))
+        app.config.setdefault('COMPRESS_MIN_SIZE', int(os.getenv('COMPRESS_MIN_SIZE', DEFAULT_MIN_SIZE)))
+        app.config.setdefault('COMPRESS_GZIP_LEVEL', int(os.getenv('COMPRESS_GZIP_LEVEL', DEFAULT_GZIP_LEVEL)))
+        app.config.setdefault('COMPRESS_BROTLI_QUALITY', int(os.getenv('COMPRESS_BROTLI_QUALITY', DEFAULT_BROTLI_QUALITY)))
+        self.enabled = app.config['COMPRESS_ENABLED']
+        self.min_size = app.config['COMPRESS_MIN_SIZE']
+        self.levels = {'gzip': app.config['COMPRESS_GZIP_LEVEL'], 'br': app.config['COMPRESS_BROTLI_QUALITY']}
+        if self.enabled:
+            app.after_request(self._compress)
+        app.extensions['compression'] = self
+
+    def _compress(self, response):
+        if response.mimetype not in COMPRESS_MIMETYPES:
+            return response
+        if response.direct_passthrough or response.is_streamed or 'Content-Encoding' in response.headers:
+            return response
+        # Ответ зависит от Accept-Encoding — кэши между сервером и браузером
+        # должны хранить сжатый и несжатый варианты отдельно
+        response.vary.add('Accept-Encoding')
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return response
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        compressed = compress(data, encoding, self.levels[encoding])
+        if len(compressed) >= len(data):
+            return response
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        # Сжатый ответ побайтно отличается от исходного: сильный ETag
+        # становится слабым, как того требует HTTP
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        with self._lock:
+            self.compressed[encoding] = self.compressed.get(encoding, 0) + 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(compressed)
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {'gzip_responses': self.compressed.get('gzip', 0), 'br_responses': self.compressed.get('br', 0),
+                    'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out}
+
+compression = Compression()
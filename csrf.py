@@ -0,0 +1,18 @@
+from flask import session
+import hmac
+import secrets
+
+# Защита форм, меняющих данные, от подделки запроса с чужого сайта:
+# токен хранится в сессии и передаётся скрытым полем формы
+
+SESSION_KEY = '_csrf_token'
+
+def csrf_token():
+    token = session.get(SESSION_KEY)
+    if token is None:
+        token = session[SESSION_KEY] = secrets.token_urlsafe(32)
+    return token
+
+def valid_csrf_token(value):
+    expected = session.get(SESSION_KEY)
+    return bool(expected and value) and hmac.compare_digest(expected, value)
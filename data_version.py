@@ -0,0 +1,54 @@
+from sqlalchemy import event, select, update, insert
+from sqlalchemy.orm import Session
+from models import db, Employee, DataVersion
+import itertools
+
+EMPLOYEES = 'employees'
+
+def bump_data_version(connection, name=EMPLOYEES):
+    # Выполняется в транзакции изменения, поэтому новая версия видна
+    # другим процессам ровно тогда же, когда и сами изменения
+    table = DataVersion.__table__
+    result = connection.execute(
+        update(table).where(table.c.name == name).values(version=table.c.version + 1))
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(name=name, version=1))
+        return 1
+    # Строка уже заблокирована этой транзакцией, поэтому прочитанная версия — своя
+    return connection.execute(select(table.c.version).where(table.c.name == name)).scalar()
+
+def set_data_version(connection, name, version):
+    table = DataVersion.__table__
+    result = connection.execute(update(table).where(table.c.name == name).values(version=version))
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(name=name, version=version))
+
+def get_data_version(name=EMPLOYEES):
+    version = db.session.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar()
+    return version or 0
+
+def ensure_data_versions(connection):
+    table = DataVersion.__table__
+    existing = set(connection.execute(select(table.c.name)).scalars())
+    if EMPLOYEES not in existing:
+        connection.execute(insert(table).values(name=EMPLOYEES, version=0))
+
+@event.listens_for(DataVersion.__table__, 'after_create')
+def _create_initial_versions(target, connection, **kw):
+    ensure_data_versions(connection)
+
+def session_versions(session):
+    # Версии, выданные изменениям текущей транзакции сессии, по порядку.
+    # По ним кэши процесса понимают, были ли между их версией и этими
+    # изменениями чужие записи (см. typeahead.py)
+    return session.info.get('data_versions', [])
+
+@event.listens_for(Session, 'after_begin')
+def _reset_session_versions(session, transaction, connection):
+    session.info['data_versions'] = []
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_employee_changes(session, flush_context):
+    # Добавление, изменение и удаление сотрудников через ORM
+    if any(isinstance(obj, Employee) for obj in itertools.chain(session.new, session.dirty, session.deleted)):
+        session.info.setdefault('data_versions', []).append(bump_data_version(session.connection()))
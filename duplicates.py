@@ -0,0 +1,85 @@
+from sqlalchemy import select, func, literal, or_, union_all, cast, String
+from models import db, Employee, sort_key_values
+
+# Поиск повторяющихся email и телефонов. Сравниваются нормализованные ключи
+# (email в нижнем регистре, телефон — только цифры), по которым в базе
+# построены уникальные индексы, поэтому проверка одного сотрудника — поиск
+# по индексу, а не перебор таблицы.
+
+# Поле формы -> ключ и текст ошибки
+DUPLICATE_FIELDS = {
+    'email': ('email_key', "Сотрудник с таким email уже есть"),
+    'phone': ('phone_key', "Сотрудник с таким телефоном уже есть"),
+}
+
+# Сколько значений передаётся в одном запросе IN при проверке импорта
+LOOKUP_CHUNK_SIZE = 500
+
+def duplicate_keys(data):
+    return sort_key_values({field: data.get(field, '') for field in DUPLICATE_FIELDS})
+
+def duplicate_errors(data, exclude_id=None):
+    # Ошибки для формы: data — поля сотрудника, exclude_id — он сам при изменении
+    keys = duplicate_keys(data)
+    statement = select(Employee.full_name, Employee.email_key, Employee.phone_key).where(
+        or_(*[getattr(Employee, key) == keys[key] for key, message in DUPLICATE_FIELDS.values()]))
+    if exclude_id is not None:
+        statement = statement.where(Employee.id != exclude_id)
+    errors = []
+    for row in db.session.execute(statement.limit(len(DUPLICATE_FIELDS))).mappings():
+        for key, message in DUPLICATE_FIELDS.values():
+            if row[key] == keys[key]:
+                errors.append(f"{message}: {row['full_name']}")
+    return errors
+
+def existing_keys(key, values):
+    column = getattr(Employee, key)
+    values = list(values)
+    found = set()
+    for start in range(0, len(values), LOOKUP_CHUNK_SIZE):
+        chunk = values[start:start + LOOKUP_CHUNK_SIZE]
+        found.update(db.session.execute(select(column).where(column.in_(chunk))).scalars())
+    return found
+
+def split_duplicates(rows, numbers):
+    # Для импорта: отделяет строки, повторяющие друг друга или уже
+    # существующих сотрудников. Возвращает оставшиеся строки, их номера и ошибки
+    taken = {key: existing_keys(key, {row[key] for row in rows}) for key, message in DUPLICATE_FIELDS.values()}
+    seen = {key: {} for key in taken}
+    kept, kept_numbers, errors = [], [], []
+    for row, number in zip(rows, numbers):
+        row_errors = []
+        for key, message in DUPLICATE_FIELDS.values():
+            if row[key] in taken[key]:
+                row_errors.append(message)
+            elif row[key] in seen[key]:
+                row_errors.append(f"{message} в строке {seen[key][row[key]]}")
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+            continue
+        for key in seen:
+            seen[key][row[key]] = number
+        kept.append(row)
+        kept_numbers.append(number)
+    return kept, kept_numbers, errors
+
+def aggregate_ids(connection, column):
+    text_id = cast(column, String)
+    if connection.dialect.name == 'sqlite':
+        return func.group_concat(text_id, ',')
+    return func.string_agg(text_id, ',')
+
+def duplicate_report(connection):
+    # Все повторы по существующим данным одним запросом: группировка по
+    # каждому ключу идёт по его индексу, без попарного сравнения строк
+    table = Employee.__table__
+    parts = []
+    for field, (key, message) in DUPLICATE_FIELDS.items():
+        parts.append(
+            select(literal(field).label('field'), table.c[key].label('value'),
+                   func.count().label('count'), aggregate_ids(connection, table.c.id).label('ids'))
+            .group_by(table.c[key])
+            .having(func.count() > 1))
+    rows = connection.execute(union_all(*parts)).mappings().all()
+    return [{'field': row['field'], 'value': row['value'], 'count': row['count'],
+             'ids': sorted(int(value) for value in row['ids'].split(','))} for row in rows]
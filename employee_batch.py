@@ -0,0 +1,70 @@
+from sqlalchemy import select, update, delete, or_
+from models import Employee, lower_key
+from data_version import bump_data_version
+from employee_stats import count_rows, apply_deltas
+from employee_changes import record_changes, CHANGE_FIELDS, UPDATE, DELETE
+
+# Действия над несколькими выбранными сотрудниками: удаление, смена должности,
+# установка и снятие испытательного срока. Каждое — несколько UPDATE/DELETE
+# по списку id в одной транзакции, а не запрос и фиксация на каждого.
+# Запросы идут мимо сессии ORM, поэтому статистика, журнал изменений и
+# версия данных обновляются здесь же (подсказки перестроятся по версии).
+
+BATCH_ACTIONS = {
+    'delete': 'Удалить',
+    'set_position': 'Сменить должность',
+    'set_probation': 'Назначить испытательный срок',
+    'clear_probation': 'Снять испытательный срок',
+}
+
+# Сколько id передаётся в одном запросе IN
+BATCH_CHUNK_SIZE = 500
+
+def batch_changes(action, position=None):
+    # Новые значения полей для действия изменения
+    if action == 'set_position':
+        return {'position': position}
+    return {'on_probation': action == 'set_probation'}
+
+def select_rows(connection, ids, values):
+    # Текущие значения затронутых сотрудников: для статистики и журнала.
+    # Строки, в которых новые значения уже стоят, не меняются. NULL тоже
+    # считается другим значением: в списке он показывается как «Нет», и
+    # снятие испытательного срока должно записать в такую строку false
+    table = Employee.__table__
+    statement = select(table.c.id, *[table.c[field] for field in CHANGE_FIELDS]).where(table.c.id.in_(ids))
+    for field, value in values.items():
+        statement = statement.where(or_(table.c[field] != value, table.c[field].is_(None)))
+    return [dict(row) for row in connection.execute(statement.order_by(table.c.id)).mappings()]
+
+def run_batch(connection, action, ids, position=None):
+    # Возвращает число изменённых или удалённых сотрудников
+    table = Employee.__table__
+    ids = sorted(set(ids))
+    values = {} if action == 'delete' else batch_changes(action, position)
+    rows = []
+    for start in range(0, len(ids), BATCH_CHUNK_SIZE):
+        chunk_rows = select_rows(connection, ids[start:start + BATCH_CHUNK_SIZE], values)
+        if not chunk_rows:
+            continue
+        chunk_ids = [row['id'] for row in chunk_rows]
+        if action == 'delete':
+            connection.execute(delete(table).where(table.c.id.in_(chunk_ids)))
+        else:
+            updates = dict(values)
+            if 'position' in updates:
+                updates['position_key'] = lower_key(position)
+            connection.execute(update(table).where(table.c.id.in_(chunk_ids)).values(updates))
+        rows.extend(chunk_rows)
+    if not rows:
+        return 0
+
+    deltas = count_rows(rows, -1)
+    if action == 'delete':
+        record_changes(connection, [(row['id'], DELETE, {}) for row in rows])
+    else:
+        deltas.update(count_rows([dict(row, **values) for row in rows]))
+        record_changes(connection, [(row['id'], UPDATE, values) for row in rows])
+    apply_deltas(connection, deltas)
+    bump_data_version(connection)
+    return len(rows)
@@ -0,0 +1,125 @@
+from sqlalchemy import event, select, insert, delete, func, case, literal, cast, Text
+from sqlalchemy.orm import attributes
+from models import Employee, EmployeeChange, DataVersion
+from data_version import set_data_version
+from datetime import datetime, timedelta
+import json
+
+# Журнал изменений сотрудников: каждая запись — номер по порядку (seq),
+# операция и изменённые поля с новыми значениями. Пишется в той же транзакции,
+# что и сами изменения, поэтому внешняя система, запомнившая последний seq,
+# получает по /api/v1/changes?since=<seq> только то, что изменилось после него.
+#
+# Старые записи удаляются (compact_changes.py). Номер последней удалённой
+# записи хранится в data_versions: клиент, отставший сильнее, должен заново
+# выгрузить весь справочник.
+
+CHANGE_FIELDS = ['full_name', 'position', 'gender', 'phone', 'email', 'on_probation', 'hire_date']
+COMPACTED = 'employee_changes_compacted'
+
+INSERT = 'insert'
+UPDATE = 'update'
+DELETE = 'delete'
+
+DEFAULT_RETENTION_DAYS = 30
+
+def dump_fields(values):
+    # Тот же вид, что даёт json_object() в SQLite при массовой записи
+    return json.dumps({field: value.isoformat() if hasattr(value, 'isoformat') else value
+                       for field, value in values.items()},
+                      ensure_ascii=False, separators=(',', ':'))
+
+def record_changes(connection, changes):
+    # changes — [(id сотрудника, операция, {поле: новое значение})]
+    if not changes:
+        return
+    created_at = datetime.utcnow()
+    connection.execute(insert(EmployeeChange.__table__), [
+        {'employee_id': employee_id, 'op': op, 'fields': dump_fields(values), 'created_at': created_at}
+        for employee_id, op, values in changes])
+
+def record_change(connection, employee_id, op, values):
+    record_changes(connection, [(employee_id, op, values)])
+
+def json_fields(connection, table):
+    # Все поля сотрудника одним JSON-объектом средствами базы
+    if connection.dialect.name == 'sqlite':
+        arguments = []
+        for field in CHANGE_FIELDS:
+            value = table.c[field]
+            if field == 'on_probation':
+                value = func.json(case((value, literal('true')), else_=literal('false')))
+            arguments += [literal(field), value]
+        return func.json_object(*arguments)
+    arguments = []
+    for field in CHANGE_FIELDS:
+        arguments += [literal(field), table.c[field]]
+    return cast(func.json_build_object(*arguments), Text)
+
+def record_inserts(connection, after_id):
+    # Для массовой вставки: записи о всех сотрудниках с id больше after_id
+    # одним INSERT ... SELECT
+    table = Employee.__table__
+    connection.execute(insert(EmployeeChange.__table__).from_select(
+        ['employee_id', 'op', 'fields', 'created_at'],
+        select(table.c.id, literal(INSERT), json_fields(connection, table), literal(datetime.utcnow()))
+        .where(table.c.id > after_id)
+        .order_by(table.c.id)))
+
+def compacted_statement():
+    return select(DataVersion.version).where(DataVersion.name == COMPACTED)
+
+def changes_statement(since, limit):
+    return (select(EmployeeChange)
+            .where(EmployeeChange.seq > since)
+            .order_by(EmployeeChange.seq)
+            .limit(limit))
+
+def change_json(change):
+    return {'seq': change.seq, 'employee_id': change.employee_id, 'op': change.op,
+            'fields': json.loads(change.fields), 'created_at': change.created_at.isoformat()}
+
+def compact_changes(connection, before):
+    # Удаляет записи старше before; возвращает число удалённых
+    table = EmployeeChange.__table__
+    last = connection.execute(select(func.max(table.c.seq)).where(table.c.created_at < before)).scalar()
+    if last is None:
+        return 0
+    result = connection.execute(delete(table).where(table.c.seq <= last))
+    set_data_version(connection, COMPACTED, last)
+    return result.rowcount
+
+def retention_cutoff(days=DEFAULT_RETENTION_DAYS):
+    return datetime.utcnow() - timedelta(days=days)
+
+def ensure_change_log(connection):
+    # Для базы, созданной до появления журнала: уже существующие сотрудники
+    # попадают в него как добавленные, чтобы синхронизация с since=0 была полной
+    table = EmployeeChange.__table__
+    if connection.execute(select(table.c.seq).limit(1)).first() is not None:
+        return False
+    if connection.execute(compacted_statement()).scalar():
+        return False
+    if connection.execute(select(Employee.id).limit(1)).first() is None:
+        return False
+    record_inserts(connection, 0)
+    return True
+
+@event.listens_for(Employee, 'after_insert')
+def _record_insert(mapper, connection, target):
+    record_change(connection, target.id, INSERT, {field: getattr(target, field) for field in CHANGE_FIELDS})
+
+@event.listens_for(Employee, 'after_update')
+def _record_update(mapper, connection, target):
+    state = attributes.instance_state(target)
+    changed = {}
+    for field in CHANGE_FIELDS:
+        history = state.attrs[field].history
+        if history.added and history.added[0] not in history.deleted:
+            changed[field] = getattr(target, field)
+    if changed:
+        record_change(connection, target.id, UPDATE, changed)
+
+@event.listens_for(Employee, 'after_delete')
+def _record_delete(mapper, connection, target):
+    record_change(connection, target.id, DELETE, {})
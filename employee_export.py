@@ -0,0 +1,58 @@
+from models import db
+from queries import employee_query
+import csv
+import io
+import json
+
+# Поля выгрузки: гость видит только ФИО и должность, как и в таблице на сайте
+PUBLIC_FIELDS = ['full_name', 'position']
+EXPORT_FIELDS = ['id', 'full_name', 'position', 'gender', 'phone', 'email', 'on_probation', 'hire_date']
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+BATCH_SIZE = 1000
+
+def iter_batches(search, sort_field, sort_order, fields, batch_size=BATCH_SIZE, filters=None):
+    # Строки читаются с курсора порциями, без загрузки всей таблицы в память
+    statement = employee_query(search, sort_field, sort_order, columns=fields, filters=filters)
+    result = db.session.execute(statement.execution_options(yield_per=batch_size))
+    try:
+        for batch in result.partitions():
+            yield batch
+    finally:
+        result.close()
+
+def export_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+def iter_csv(batches, fields):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM нужен, чтобы Excel открыл файл в UTF-8
+    buffer.write('\ufeff')
+    writer.writerow(fields)
+    yield buffer.getvalue()
+    for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in batch:
+            writer.writerow(['true' if value is True else 'false' if value is False else export_value(value)
+                             for value in row])
+        yield buffer.getvalue()
+
+def iter_ndjson(batches, fields):
+    for batch in batches:
+        yield ''.join(json.dumps({field: export_value(value) for field, value in zip(fields, row)},
+                                 ensure_ascii=False) + '\n'
+                      for row in batch)
+
+def iter_export(export_format, search, sort_field, sort_order, fields, filters=None):
+    batches = iter_batches(search, sort_field, sort_order, fields, filters=filters)
+    if export_format == 'ndjson':
+        return iter_ndjson(batches, fields)
+    return iter_csv(batches, fields)
@@ -0,0 +1,104 @@
+from sqlalchemy import insert, select, func
+from models import db, Employee, sort_key_values
+from search_index import deferred_indexing
+from data_version import bump_data_version
+from employee_changes import record_inserts
+from employee_stats import apply_rows as count_imported_rows
+from validation import check_employee_data
+from duplicates import split_duplicates
+from datetime import date, datetime
+import csv
+import io
+
+IMPORT_FIELDS = ['full_name', 'position', 'gender', 'phone', 'email', 'on_probation', 'hire_date']
+TRUE_VALUES = {'1', 'true', 'yes', 'on', 'да', 'y', 'д', '+'}
+
+DEFAULT_CHUNK_SIZE = 1000
+
+def read_csv_rows(stream):
+    # Файл читается построчно; utf-8-sig убирает BOM из выгрузки /employees/export
+    text_stream = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    return list(csv.DictReader(text_stream))
+
+def read_json_rows(payload):
+    # Принимается список объектов или {"employees": [...]}
+    if isinstance(payload, dict):
+        payload = payload.get('employees')
+    if not isinstance(payload, list):
+        raise ValueError("Ожидается список сотрудников")
+    return payload
+
+def as_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+def parse_probation(value):
+    if isinstance(value, bool):
+        return value
+    return as_text(value).strip().lower() in TRUE_VALUES
+
+def prepare_rows(rows):
+    # Проверяет все строки по правилам формы; дата сравнивается с одним
+    # и тем же «сегодня» и разбирается один раз
+    today = date.today()
+    created_at = datetime.utcnow()
+    valid = []
+    numbers = []
+    errors = []
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'errors': ["Строка должна быть объектом с полями сотрудника"]})
+            continue
+        data = {field: as_text(row.get(field)).strip() for field in IMPORT_FIELDS}
+        row_errors, hire_date = check_employee_data(data, today)
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+            continue
+        values = {
+            'full_name': data['full_name'],
+            'position': data['position'],
+            'gender': data['gender'],
+            'phone': data['phone'],
+            'email': data['email'],
+            'on_probation': parse_probation(row.get('on_probation')),
+            'hire_date': hire_date,
+            'created_at': created_at,
+        }
+        # Ключи сортировки считаются здесь, а не значениями по умолчанию столбцов
+        values.update(sort_key_values(values))
+        valid.append(values)
+        numbers.append(number)
+    return valid, numbers, errors
+
+def insert_rows(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    # Массовая вставка порциями: один executemany на порцию вместо
+    # отдельного объекта и INSERT на каждого сотрудника
+    connection = db.session.connection()
+    statement = insert(Employee.__table__)
+    last_id = connection.execute(select(func.max(Employee.id))).scalar() or 0
+    with deferred_indexing(connection):
+        for start in range(0, len(rows), chunk_size):
+            connection.execute(statement, rows[start:start + chunk_size])
+    # Массовая вставка идёт мимо сессии ORM, поэтому версия данных,
+    # статистика и журнал изменений обновляются явно
+    count_imported_rows(connection, rows)
+    record_inserts(connection, last_id)
+    bump_data_version(connection)
+
+def import_employees(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    valid, numbers, errors = prepare_rows(rows)
+    # Повторы email и телефона внутри файла и с уже существующими сотрудниками
+    valid, numbers, duplicate_errors = split_duplicates(valid, numbers)
+    if duplicate_errors:
+        errors = sorted(errors + duplicate_errors, key=lambda item: item['row'])
+    if valid:
+        try:
+            insert_rows(valid, chunk_size)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return {'total': len(rows), 'imported': len(valid), 'errors': errors}
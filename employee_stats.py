@@ -0,0 +1,143 @@
+from sqlalchemy import event, select, update, insert, delete, func, case, literal
+from sqlalchemy.orm import attributes
+from models import db, Employee, EmployeeStat
+from collections import Counter
+
+# Сводная статистика по сотрудникам: численность по должностям, полу,
+# испытательному сроку и месяцам приёма. Счётчики хранятся в таблице
+# employee_stats и меняются на разницу в той же транзакции, что и сами
+# сотрудники, поэтому страница статистики не перебирает таблицу employees.
+
+DIMENSIONS = ['total', 'position', 'gender', 'on_probation', 'hire_month']
+STAT_FIELDS = ['position', 'gender', 'on_probation', 'hire_date']
+
+def probation_value(on_probation):
+    return 'true' if on_probation else 'false'
+
+def contributions(values):
+    # Строки статистики, в которые входит сотрудник с такими значениями полей
+    return [
+        ('total', ''),
+        ('position', values['position']),
+        ('gender', values['gender']),
+        ('on_probation', probation_value(values['on_probation'])),
+        ('hire_month', values['hire_date'].strftime('%Y-%m')),
+    ]
+
+def apply_deltas(connection, deltas):
+    table = EmployeeStat.__table__
+    for (dimension, value), delta in deltas.items():
+        if not delta:
+            continue
+        result = connection.execute(
+            update(table)
+            .where(table.c.dimension == dimension, table.c.value == value)
+            .values(count=table.c.count + delta))
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(dimension=dimension, value=value, count=delta))
+
+def count_rows(rows, sign=1):
+    # Разница счётчиков для набора строк (словарей с полями сотрудника)
+    deltas = Counter()
+    for row in rows:
+        for key in contributions(row):
+            deltas[key] += sign
+    return deltas
+
+def apply_rows(connection, rows, sign=1):
+    apply_deltas(connection, count_rows(rows, sign))
+
+def hire_month(connection, column):
+    if connection.dialect.name == 'sqlite':
+        return func.strftime('%Y-%m', column)
+    return func.to_char(column, 'YYYY-MM')
+
+def stat_queries(connection):
+    # По одному GROUP BY на измерение — для полного пересчёта и проверки
+    table = Employee.__table__
+    probation = case((table.c.on_probation, literal('true')), else_=literal('false'))
+    month = hire_month(connection, table.c.hire_date)
+    yield select(literal('total'), literal(''), func.count()).select_from(table)
+    for dimension, expression in [('position', table.c.position), ('gender', table.c.gender),
+                                  ('on_probation', probation), ('hire_month', month)]:
+        yield select(literal(dimension), expression, func.count()).group_by(expression)
+
+def compute_stats(connection):
+    counts = {}
+    for statement in stat_queries(connection):
+        for dimension, value, count in connection.execute(statement):
+            counts[(dimension, value)] = count
+    return counts
+
+def stored_stats(connection):
+    table = EmployeeStat.__table__
+    return {(dimension, value): count for dimension, value, count in connection.execute(
+        select(table.c.dimension, table.c.value, table.c.count).where(table.c.count != 0))}
+
+def verify_stats(connection):
+    # Расхождения между счётчиками и пересчётом: [(измерение, значение, хранится, должно быть)]
+    expected = {key: count for key, count in compute_stats(connection).items() if count}
+    stored = stored_stats(connection)
+    return [(dimension, value, stored.get((dimension, value), 0), expected.get((dimension, value), 0))
+            for dimension, value in sorted(set(expected) | set(stored))
+            if stored.get((dimension, value), 0) != expected.get((dimension, value), 0)]
+
+def recompute_stats(connection):
+    table = EmployeeStat.__table__
+    connection.execute(delete(table))
+    for statement in stat_queries(connection):
+        connection.execute(insert(table).from_select(['dimension', 'value', 'count'], statement))
+
+def ensure_stats(connection):
+    # Для базы, созданной до появления статистики; строка total есть всегда
+    table = EmployeeStat.__table__
+    exists = connection.execute(select(table.c.count).where(table.c.dimension == 'total')).first()
+    if exists is None:
+        recompute_stats(connection)
+        return True
+    return False
+
+def read_stats():
+    # Читает только сводную таблицу: размер ответа зависит от числа
+    # должностей и месяцев, а не от числа сотрудников
+    result = {'total': 0, 'position': [], 'gender': {}, 'on_probation': {}, 'hire_month': []}
+    rows = db.session.execute(
+        select(EmployeeStat.dimension, EmployeeStat.value, EmployeeStat.count)
+        .where(EmployeeStat.count > 0))
+    for dimension, value, count in rows:
+        if dimension == 'total':
+            result['total'] = count
+        elif dimension in ('gender', 'on_probation'):
+            result[dimension][value] = count
+        else:
+            result[dimension].append({'value': value, 'count': count})
+    result['position'].sort(key=lambda item: (-item['count'], item['value']))
+    result['hire_month'].sort(key=lambda item: item['value'])
+    return result
+
+def current_values(target):
+    return {field: getattr(target, field) for field in STAT_FIELDS}
+
+def previous_values(target):
+    # Значения до изменения берутся из истории атрибутов ORM
+    values = {}
+    state = attributes.instance_state(target)
+    for field in STAT_FIELDS:
+        history = state.attrs[field].load_history()
+        values[field] = history.deleted[0] if history.deleted else getattr(target, field)
+    return values
+
+@event.listens_for(Employee, 'after_insert')
+def _count_inserted(mapper, connection, target):
+    apply_rows(connection, [current_values(target)])
+
+@event.listens_for(Employee, 'before_update')
+def _count_updated(mapper, connection, target):
+    deltas = count_rows([current_values(target)])
+    deltas.subtract(count_rows([previous_values(target)]))
+    apply_deltas(connection, deltas)
+
+@event.listens_for(Employee, 'before_delete')
+def _count_deleted(mapper, connection, target):
+    # До удаления строки: значения ещё можно дочитать из базы
+    apply_rows(connection, [current_values(target)], -1)
@@ -0,0 +1,143 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+import os
+import re
+import sqlite3
+import threading
+import time
+
+# Настройки подключений к базе. Всё задаётся конфигурацией или переменными
+# окружения, поэтому параллельность настраивается без изменения кода:
+#   SQLITE_JOURNAL_MODE=wal SQLITE_BUSY_TIMEOUT=5000 DB_POOL_SIZE=10 ...
+
+# PRAGMA для каждого нового подключения SQLite: WAL позволяет читать во время
+# записи, busy_timeout ждёт освобождения блокировки вместо «database is locked»
+SQLITE_PRAGMAS = {
+    'journal_mode': ('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': ('SQLITE_SYNCHRONOUS', 'normal'),
+    'busy_timeout': ('SQLITE_BUSY_TIMEOUT', '5000'),
+    'mmap_size': ('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)),
+    'cache_size': ('SQLITE_CACHE_SIZE', '-65536'),
+}
+
+# Параметры пула подключений: ключ конфигурации -> аргумент create_engine
+POOL_OPTIONS = {
+    'DB_POOL_SIZE': ('pool_size', int),
+    'DB_MAX_OVERFLOW': ('max_overflow', int),
+    'DB_POOL_TIMEOUT': ('pool_timeout', float),
+    'DB_POOL_RECYCLE': ('pool_recycle', int),
+    'DB_POOL_PRE_PING': ('pool_pre_ping', lambda value: str(value).lower() in ('1', 'true', 'yes', 'on')),
+}
+
+# Значения подставляются прямо в текст PRAGMA, поэтому допускаются только
+# числа и слова вроде wal или normal
+PRAGMA_VALUE_RE = re.compile(r'^-?[A-Za-z0-9_]+$')
+
+class TimedQueuePool(QueuePool):
+    # Обычный пул с учётом времени ожидания свободного подключения
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.connections_created = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            # Сюда входит и открытие нового подключения, если свободных не было
+            waited = time.perf_counter() - started
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def _create_connection(self):
+        with self._metrics_lock:
+            self.connections_created += 1
+        return super()._create_connection()
+
+    def stats(self):
+        with self._metrics_lock:
+            return {
+                'size': self.size(),
+                'checked_out': self.checkedout(),
+                'checked_in': self.checkedin(),
+                'overflow': self.overflow(),
+                'connections_created': self.connections_created,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_seconds_total,
+                'max_wait_seconds': self.max_wait_seconds,
+            }
+
+def is_memory_database(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+class EngineProfile:
+    def __init__(self):
+        self.pragmas = {}
+
+    def init_app(self, app):
+        # Вызывается до db.init_app: параметры пула попадают в create_engine
+        for name, (key, default) in SQLITE_PRAGMAS.items():
+            app.config.setdefault(key, os.getenv(key, default))
+        for key in POOL_OPTIONS:
+            if os.getenv(key) is not None:
+                app.config.setdefault(key, os.getenv(key))
+
+        if not app.config.get('SQLALCHEMY_DATABASE_URI'):
+            # Об отсутствующем адресе базы сообщит сам Flask-SQLAlchemy
+            return
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        # База в памяти живёт в одном подключении, пул ей не нужен
+        if not is_memory_database(url):
+            options.setdefault('poolclass', TimedQueuePool)
+            for key, (option, convert) in POOL_OPTIONS.items():
+                if app.config.get(key) is not None:
+                    options.setdefault(option, convert(app.config[key]))
+
+        self.pragmas = {}
+        if url.get_backend_name() == 'sqlite':
+            for name, (key, default) in SQLITE_PRAGMAS.items():
+                value = str(app.config[key] if app.config[key] is not None else '')
+                if not value:
+                    continue
+                if not PRAGMA_VALUE_RE.match(value):
+                    raise ValueError(f"Недопустимое значение {key}: {value}")
+                if is_memory_database(url) and name in ('journal_mode', 'mmap_size'):
+                    continue
+                self.pragmas[name] = value
+        app.extensions['engine_profile'] = self
+
+    def apply_pragmas(self, dbapi_connection):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in self.pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+    def pool_stats(self, engine):
+        pool = engine.pool
+        if isinstance(pool, TimedQueuePool):
+            return pool.stats()
+        return {'status': pool.status()}
+
+engine_profile = EngineProfile()
+
+@event.listens_for(Engine, 'connect')
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection) and engine_profile.pragmas:
+        engine_profile.apply_pragmas(dbapi_connection)
@@ -0,0 +1,63 @@
+from sqlalchemy import select, func, literal, case, union_all, String, cast
+from models import db, Employee
+from queries import filter_employees
+
+# Число сотрудников для каждого значения фильтра при текущем поиске и
+# остальных фильтрах. Все измерения считаются одним запросом UNION ALL из
+# GROUP BY по индексированным столбцам, строки сотрудников не загружаются.
+# Свой фильтр измерения при подсчёте не учитывается: видно, сколько
+# сотрудников будет при выборе другого значения.
+
+FACETS = ['position', 'gender', 'on_probation', 'hire_year']
+PUBLIC_FACETS = ['position']
+
+# Фильтры, которые не учитываются при подсчёте измерения
+FACET_FILTERS = {
+    'position': ('position',),
+    'gender': ('gender',),
+    'on_probation': ('on_probation',),
+    'hire_year': ('hired_from', 'hired_to'),
+}
+
+def hire_year(column):
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.strftime('%Y', column)
+    return func.to_char(column, 'YYYY')
+
+def facet_expressions(facet):
+    # (значение для группировки, подпись); должность группируется по ключу
+    # в нижнем регистре, как и фильтруется, подпись — одно из написаний
+    if facet == 'position':
+        return Employee.position_key, func.min(Employee.position)
+    if facet == 'gender':
+        return Employee.gender, Employee.gender
+    if facet == 'on_probation':
+        value = case((Employee.on_probation, literal('true')), else_=literal('false'))
+        return value, value
+    year = hire_year(Employee.hire_date)
+    return year, year
+
+def facet_statement(search, filters, facets):
+    parts = []
+    for facet in facets:
+        value, label = facet_expressions(facet)
+        statement = select(literal(facet).label('facet'), cast(value, String).label('value'),
+                           cast(label, String).label('label'), func.count().label('count'))
+        statement = filter_employees(statement.select_from(Employee), search, filters, FACET_FILTERS[facet])
+        parts.append(statement.group_by(value))
+    return union_all(*parts)
+
+def facet_counts(search='', filters=None, facets=FACETS):
+    # {измерение: [(значение, подпись, число)]}; должности — по убыванию числа,
+    # годы — от последнего
+    counts = {facet: [] for facet in facets}
+    for row in db.session.execute(facet_statement(search, filters or {}, facets)):
+        counts[row.facet].append((row.value, row.label, row.count))
+    for facet, values in counts.items():
+        if facet == 'position':
+            values.sort(key=lambda item: (-item[2], item[0]))
+        elif facet == 'hire_year':
+            values.sort(reverse=True)
+        else:
+            values.sort()
+    return counts
@@ -0,0 +1,231 @@
+from flask import g, request, session, has_request_context, Response, abort, before_render_template, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import bisect
+import hmac
+import logging
+import os
+import threading
+import time
+
+# Метрики процесса в формате Prometheus: время ответа по маршрутам, число и время
+# SQL-запросов, время отрисовки шаблонов. Каждое наблюдение — несколько сложений
+# под блокировкой, поэтому сбор можно не выключать в рабочем режиме.
+# Значения свои у каждого процесса-воркера.
+
+# Без METRICS_TOKEN метрики отдаются только на локальные адреса (сборщик на той же машине)
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SQL_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 200)
+
+logger = logging.getLogger('metrics')
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{format_labels(self.labels, label_values)} {value}')
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # Метки -> [число наблюдений по корзинам, сумма, количество]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, label_values=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(list(self.buckets) + ['+Inf'], counts):
+                    cumulative += bucket_count
+                    labels = format_labels(self.labels, label_values, [('le', bound)])
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = format_labels(self.labels, label_values)
+                lines.append(f'{self.name}_sum{labels} {total}')
+                lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+class Metrics:
+    def __init__(self):
+        self.slow_request_seconds = 0.5
+        self.slow_query_seconds = 0.1
+        self.token = None
+        self._gauges = []
+        self.requests = Counter('http_requests_total', 'Число ответов', ('method', 'route', 'status'))
+        self.request_seconds = Histogram('http_request_duration_seconds', 'Время ответа',
+                                         ('method', 'route'))
+        self.request_sql_count = Histogram('http_request_sql_statements', 'SQL-запросов на один ответ',
+                                           ('route',), SQL_COUNT_BUCKETS)
+        self.request_sql_seconds = Counter('http_request_sql_seconds_total', 'Время SQL-запросов',
+                                           ('route',))
+        self.request_template_seconds = Counter('http_request_template_seconds_total',
+                                                'Время отрисовки шаблонов', ('route',))
+        self.sql_seconds = Histogram('sql_statement_duration_seconds', 'Время одного SQL-запроса')
+        self.template_seconds = Histogram('template_render_duration_seconds', 'Время отрисовки шаблона',
+                                          ('template',))
+        self.slow_requests = Counter('slow_requests_total', 'Медленные ответы', ('route',))
+        self.slow_queries = Counter('slow_sql_statements_total', 'Медленные SQL-запросы')
+
+    def init_app(self, app):
+        app.config.setdefault('SLOW_REQUEST_SECONDS', float(os.getenv('SLOW_REQUEST_SECONDS', 0.5)))
+        app.config.setdefault('SLOW_QUERY_SECONDS', float(os.getenv('SLOW_QUERY_SECONDS', 0.1)))
+        # Если задан, /metrics отдаётся только с заголовком Authorization: Bearer <токен>,
+        # иначе — только на запросы с этой же машины. Кадровику после входа — всегда
+        app.config.setdefault('METRICS_TOKEN', os.getenv('METRICS_TOKEN'))
+        self.slow_request_seconds = app.config['SLOW_REQUEST_SECONDS']
+        self.slow_query_seconds = app.config['SLOW_QUERY_SECONDS']
+        self.token = app.config['METRICS_TOKEN']
+
+        app.before_request(self._start_request)
+        app.after_request(self._add_server_timing)
+        app.teardown_request(self._finish_request)
+        before_render_template.connect(self._start_template, app)
+        template_rendered.connect(self._finish_template, app)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+        app.extensions['metrics'] = self
+
+    def add_gauges(self, prefix, collect):
+        # collect() возвращает словарь чисел, например password_hasher.stats
+        self._gauges.append((prefix, collect))
+
+    def _start_request(self):
+        g._metrics = {'started': time.perf_counter(), 'sql_count': 0, 'sql_seconds': 0.0,
+                      'template_seconds': 0.0, 'templates': [], 'status': None}
+
+    def _add_server_timing(self, response):
+        current = g.get('_metrics')
+        if current is not None:
+            current['status'] = response.status_code
+            response.headers['Server-Timing'] = (
+                f"db;dur={current['sql_seconds'] * 1000:.1f};desc=\"{current['sql_count']} SQL\", "
+                f"tpl;dur={current['template_seconds'] * 1000:.1f}")
+        return response
+
+    def _finish_request(self, exception=None):
+        current = g.pop('_metrics', None)
+        if current is None:
+            return
+        elapsed = time.perf_counter() - current['started']
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        status = current['status'] or (500 if exception else 200)
+        self.requests.inc((request.method, route, status))
+        self.request_seconds.observe(elapsed, (request.method, route))
+        self.request_sql_count.observe(current['sql_count'], (route,))
+        self.request_sql_seconds.inc((route,), current['sql_seconds'])
+        self.request_template_seconds.inc((route,), current['template_seconds'])
+        if elapsed >= self.slow_request_seconds:
+            self.slow_requests.inc((route,))
+            # Путь без строки запроса: в ней поисковые фразы (ФИО, части телефонов)
+            logger.warning("Медленный ответ %s %s: %.3f с, SQL: %d за %.3f с, шаблоны: %.3f с",
+                           request.method, request.path, elapsed, current['sql_count'],
+                           current['sql_seconds'], current['template_seconds'])
+
+    def _start_template(self, sender, template, context, **extra):
+        current = g.get('_metrics') if has_request_context() else None
+        if current is not None:
+            current['templates'].append(time.perf_counter())
+
+    def _finish_template(self, sender, template, context, **extra):
+        current = g.get('_metrics') if has_request_context() else None
+        if current is None or not current['templates']:
+            return
+        elapsed = time.perf_counter() - current['templates'].pop()
+        # Вложенная отрисовка уже входит во внешнюю
+        if not current['templates']:
+            current['template_seconds'] += elapsed
+        self.template_seconds.observe(elapsed, (template.name or 'string',))
+
+    def observe_statement(self, statement, elapsed):
+        self.sql_seconds.observe(elapsed)
+        if has_request_context():
+            current = g.get('_metrics')
+            if current is not None:
+                current['sql_count'] += 1
+                current['sql_seconds'] += elapsed
+        if elapsed >= self.slow_query_seconds:
+            self.slow_queries.inc()
+            logger.warning("Медленный SQL-запрос: %.3f с: %s", elapsed, ' '.join(statement.split())[:300])
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.request_seconds, self.request_sql_count, self.request_sql_seconds,
+                       self.request_template_seconds, self.sql_seconds, self.template_seconds,
+                       self.slow_requests, self.slow_queries):
+            lines.extend(metric.render())
+        for prefix, collect in self._gauges:
+            for key, value in sorted(collect().items()):
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                lines.append(f'# TYPE {prefix}_{key} gauge')
+                lines.append(f'{prefix}_{key} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def allowed(self):
+        if session.get('is_hr'):
+            return True
+        if self.token:
+            return hmac.compare_digest(request.headers.get('Authorization', '').encode('utf-8'),
+                                       f'Bearer {self.token}'.encode('utf-8'))
+        return request.remote_addr in LOCAL_ADDRESSES
+
+    def view(self):
+        if not self.allowed():
+            abort(403)
+        return Response(self.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+metrics = Metrics()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    connection.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+    started = connection.info.get('_metrics_started')
+    if started:
+        metrics.observe_statement(statement, time.perf_counter() - started.pop())
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # Запрос завершился ошибкой: after_cursor_execute не будет вызван
+    started = context.connection.info.get('_metrics_started') if context.connection is not None else None
+    if started:
+        started.pop()
@@ -1,9 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+from passwords import password_hasher
 from datetime import datetime
+import re
+import sqlite3
 
 db = SQLAlchemy()
 
+# Встроенные LOWER() и LIKE в SQLite меняют регистр только у латиницы,
+# поэтому для кириллицы регистрируем lower() из Python как SQL-функцию
+def _py_lower(value):
+    return value.lower() if isinstance(value, str) else value
+
+@event.listens_for(Engine, 'connect')
+def _register_sqlite_functions(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function('py_lower', 1, _py_lower, deterministic=True)
+
+def fold(expression):
+    # Приведение к нижнему регистру на стороне БД с теми же правилами, что и str.lower()
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.py_lower(expression)
+    return func.lower(expression)
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -13,11 +33,44 @@ class User(db.Model):
     is_hr = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # Хеширование выполняется в ограниченном пуле потоков (см. passwords.py);
+    # при перегрузке пула выбрасывается PasswordHashingBusy
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
+
+# Ключи сортировки: нормализованные копии полей, по которым строятся индексы
+def lower_key(value):
+    # Пробелы по краям не входят в ключ: ' a@b.ru ' и 'a@b.ru' — один email
+    return value.strip().lower() if value else ''
+
+NOT_DIGIT_RE = re.compile(r'[^\d]')
+
+def digits_key(value):
+    return NOT_DIGIT_RE.sub('', value or '')
+
+SORT_KEYS = {
+    'full_name_key': ('full_name', lower_key),
+    'position_key': ('position', lower_key),
+    'email_key': ('email', lower_key),
+    'phone_key': ('phone', digits_key),
+}
+
+def sort_key_values(values):
+    # Ключи для переданных исходных полей; нужны массовым INSERT/UPDATE
+    return {key: normalize(values[source]) for key, (source, normalize) in SORT_KEYS.items()
+            if source in values}
+
+def _sort_key_default(key):
+    source, normalize = SORT_KEYS[key]
+    def default(context):
+        return normalize(context.get_current_parameters().get(source))
+    return default
 
 class Employee(db.Model):
     __tablename__ = 'employees'
@@ -30,4 +83,78 @@ class Employee(db.Model):
     email = db.Column(db.String(100), nullable=False)
     on_probation = db.Column(db.Boolean, default=False)
     hire_date = db.Column(db.Date, nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Заполняются автоматически при вставке и изменении строки
+    full_name_key = db.Column(db.String(100), nullable=False, default=_sort_key_default('full_name_key'))
+    position_key = db.Column(db.String(100), nullable=False, default=_sort_key_default('position_key'))
+    email_key = db.Column(db.String(100), nullable=False, default=_sort_key_default('email_key'))
+    phone_key = db.Column(db.String(20), nullable=False, default=_sort_key_default('phone_key'))
+    
+    # Составные индексы под каждую сортировку из интерфейса; id в конце
+    # делает порядок однозначным, и оба направления читаются по индексу
+    __table_args__ = (
+        db.Index('ix_employees_full_name_key', 'full_name_key', 'id'),
+        db.Index('ix_employees_position_key', 'position_key', 'id'),
+        db.Index('ix_employees_email_key', 'email_key', 'id'),
+        db.Index('ix_employees_phone_key', 'phone_key', 'id'),
+        db.Index('ix_employees_gender', 'gender', 'id'),
+        db.Index('ix_employees_hire_date', 'hire_date', 'id'),
+        db.Index('ix_employees_on_probation', 'on_probation', 'id'),
+        # Снятие испытательного срока по дате приёма (см. probation.py)
+        db.Index('ix_employees_probation_hire_date', 'on_probation', 'hire_date'),
+        # Один email и один телефон на сотрудника (см. duplicates.py)
+        db.Index('ux_employees_email_key', 'email_key', unique=True),
+        db.Index('ux_employees_phone_key', 'phone_key', unique=True),
+    )
+
+@event.listens_for(Employee, 'before_update')
+def _update_sort_keys(mapper, connection, target):
+    for key, (source, normalize) in SORT_KEYS.items():
+        setattr(target, key, normalize(getattr(target, source)))
+
+class DataVersion(db.Model):
+    # Счётчик изменений данных: увеличивается при каждой записи в таблицу,
+    # по нему процессы приложения узнают, что их кэши устарели
+    __tablename__ = 'data_versions'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+class SweepState(db.Model):
+    # Время последнего запуска периодической задачи (unix-время): по нему
+    # из нескольких воркеров очередной запуск выполняет один (см. probation.py)
+    __tablename__ = 'sweep_state'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    last_run_at = db.Column(db.Integer, nullable=False, default=0)
+
+class EmployeeStat(db.Model):
+    # Сводные счётчики по сотрудникам (см. employee_stats.py): одна строка
+    # на значение измерения, например ('position', 'Бухгалтер') -> 12
+    __tablename__ = 'employee_stats'
+    
+    dimension = db.Column(db.String(20), primary_key=True)
+    value = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class SchemaVersion(db.Model):
+    # Номер версии структуры базы, которую создал bootstrap.py
+    __tablename__ = 'schema_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class EmployeeChange(db.Model):
+    # Журнал изменений сотрудников для синхронизации внешних систем
+    # (см. employee_changes.py). AUTOINCREMENT: номера не повторяются
+    # и после удаления старых записей
+    __tablename__ = 'employee_changes'
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    seq = db.Column(db.Integer, primary_key=True)
+    employee_id = db.Column(db.Integer, nullable=False)
+    op = db.Column(db.String(10), nullable=False)
+    fields = db.Column(db.Text, nullable=False, default='{}')
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -0,0 +1,120 @@
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+import os
+import threading
+import time
+
+# Ограничение числа одновременных хешей паролей в процессе. Хеш считается
+# в пуле из workers потоков, поток запроса ждёт результат: пул не освобождает
+# воркер сервера, а только не даёт входам занять все ядра. В очереди ждут
+# не больше max_queue хешей, остальные сразу получают PasswordHashingBusy.
+
+class PasswordHashingBusy(Exception):
+    pass
+
+def normalize_method(method):
+    # Приводит метод к виду, который werkzeug записывает в начало хеша,
+    # например «pbkdf2:sha256» -> «pbkdf2:sha256:600000»
+    parts = method.split(':')
+    if parts[0] == 'pbkdf2':
+        hash_name = parts[1] if len(parts) > 1 else 'sha256'
+        iterations = int(parts[2]) if len(parts) > 2 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    if parts[0] == 'scrypt':
+        defaults = ['32768', '8', '1']
+        n, r, p = (int(value) for value in (parts[1:] + defaults[len(parts) - 1:])[:3])
+        return f'scrypt:{n}:{r}:{p}'
+    return method
+
+class PasswordHasher:
+    def __init__(self, method='pbkdf2:sha256', workers=2, max_queue=32):
+        self.method = normalize_method(method)
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+        self._executor_pid = None
+        self._lock = threading.Lock()
+        self._slots = None
+        self._running = 0
+        self._queued = 0
+        self._max_queued = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._hash_seconds = 0.0
+
+    def init_app(self, app):
+        app.config.setdefault('PASSWORD_HASH_METHOD', os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256'))
+        app.config.setdefault('PASSWORD_HASH_WORKERS', int(os.getenv('PASSWORD_HASH_WORKERS', 2)))
+        app.config.setdefault('PASSWORD_HASH_QUEUE', int(os.getenv('PASSWORD_HASH_QUEUE', 32)))
+        self.method = normalize_method(app.config['PASSWORD_HASH_METHOD'])
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.max_queue = app.config['PASSWORD_HASH_QUEUE']
+        app.extensions['password_hasher'] = self
+
+    def _get_executor(self):
+        # Пул создаётся при первом использовании в каждом процессе:
+        # потоки не переживают fork воркеров сервера
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                        thread_name_prefix='password-hash')
+                    self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+                    self._executor_pid = pid
+        return self._executor
+
+    def _run(self, function, *args):
+        executor = self._get_executor()
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PasswordHashingBusy("Слишком много одновременных проверок пароля")
+        submitted = time.perf_counter()
+        with self._lock:
+            self._queued += 1
+            self._max_queued = max(self._max_queued, self._queued)
+
+        def task():
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+                self._wait_seconds += started - submitted
+            try:
+                return function(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    self._hash_seconds += time.perf_counter() - started
+                self._slots.release()
+
+        return executor.submit(task).result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        # Хеш создан другим методом или с другой стоимостью
+        return password_hash.split('$', 1)[0] != self.method
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'max_queue': self.max_queue,
+                'running': self._running,
+                'queued': self._queued,
+                'max_queued': self._max_queued,
+                'completed': self._completed,
+                'rejected': self._rejected,
+                'wait_seconds_total': self._wait_seconds,
+                'hash_seconds_total': self._hash_seconds,
+            }
+
+password_hasher = PasswordHasher()
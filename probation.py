@@ -0,0 +1,133 @@
+from sqlalchemy import select, update, insert, delete, case, literal, true, false
+from models import db, Employee, DataVersion, SweepState
+from data_version import bump_data_version
+from employee_stats import apply_deltas
+from employee_changes import record_changes, UPDATE
+from datetime import date, timedelta
+import json
+import os
+import random
+import threading
+import time
+
+# Снятие испытательного срока по дате приёма: сотрудникам, принятым раньше,
+# чем срок назад, флаг on_probation сбрасывается одним UPDATE в транзакции.
+# Срок по умолчанию — PROBATION_DAYS дней, для отдельных должностей задаётся
+# PROBATION_DAYS_BY_POSITION, например {"Директор": 180, "Стажёр": 30}.
+#
+# Запускается командой sweep_probation.py (cron) или периодически внутри
+# приложения (PROBATION_SWEEP_INTERVAL секунд). Из нескольких воркеров
+# очередной запуск выполняет один: время последнего запуска хранится
+# в sweep_state и захватывается условным UPDATE.
+
+DEFAULT_PROBATION_DAYS = 90
+LAST_SWEEP = 'probation_sweep'
+
+def probation_cutoffs(today, default_days, days_by_position):
+    # Испытательный срок закончился, если сотрудник принят не позже этой даты
+    default_cutoff = today - timedelta(days=default_days)
+    by_position = {position: today - timedelta(days=days) for position, days in days_by_position.items()}
+    return default_cutoff, by_position
+
+def sweep_probation(connection, today=None, default_days=DEFAULT_PROBATION_DAYS, days_by_position=None):
+    # Возвращает число сотрудников, у которых снят испытательный срок
+    table = Employee.__table__
+    default_cutoff, by_position = probation_cutoffs(today or date.today(), default_days, days_by_position or {})
+    # Граница по самой поздней дате отсекает остальных по индексу
+    # (on_probation, hire_date); точное условие — по сроку должности
+    latest = max([default_cutoff] + list(by_position.values()))
+    conditions = [table.c.on_probation == true(), table.c.hire_date <= latest]
+    if by_position:
+        conditions.append(table.c.hire_date <= case(
+            *[(table.c.position == position, literal(value)) for position, value in by_position.items()],
+            else_=literal(default_cutoff)))
+    statement = update(table).where(*conditions).values(on_probation=false()).returning(table.c.id)
+    ids = connection.execute(statement).scalars().all()
+    if not ids:
+        return 0
+    # Меняется только испытательный срок: в статистике это одна пара счётчиков
+    apply_deltas(connection, {('on_probation', 'true'): -len(ids), ('on_probation', 'false'): len(ids)})
+    record_changes(connection, [(employee_id, UPDATE, {'on_probation': False}) for employee_id in ids])
+    bump_data_version(connection)
+    return len(ids)
+
+def claim_sweep(connection, interval, now=None):
+    # True, если этот процесс выполняет очередной запуск: условный UPDATE
+    # выполнится только в одном из воркеров, проснувшихся одновременно
+    now = int(now if now is not None else time.time())
+    table = SweepState.__table__
+    result = connection.execute(update(table)
+                                .where(table.c.name == LAST_SWEEP, table.c.last_run_at <= now - interval)
+                                .values(last_run_at=now))
+    if result.rowcount:
+        return True
+    exists = connection.execute(select(table.c.last_run_at).where(table.c.name == LAST_SWEEP)).first()
+    if exists is None:
+        connection.execute(insert(table).values(name=LAST_SWEEP, last_run_at=now))
+        return True
+    return False
+
+def remove_legacy_lease(connection):
+    # Раньше время запуска хранилось строкой в data_versions, среди счётчиков версий
+    table = DataVersion.__table__
+    connection.execute(delete(table).where(table.c.name == LAST_SWEEP))
+
+class ProbationSweep:
+    def __init__(self):
+        self.default_days = DEFAULT_PROBATION_DAYS
+        self.days_by_position = {}
+        self.interval = 0
+        self.runs = 0
+        self.cleared = 0
+        self.errors = 0
+        self._app = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('PROBATION_DAYS', int(os.getenv('PROBATION_DAYS', DEFAULT_PROBATION_DAYS)))
+        app.config.setdefault('PROBATION_DAYS_BY_POSITION', json.loads(os.getenv('PROBATION_DAYS_BY_POSITION', '{}')))
+        # 0 — периодический запуск выключен, остаётся sweep_probation.py
+        app.config.setdefault('PROBATION_SWEEP_INTERVAL', int(os.getenv('PROBATION_SWEEP_INTERVAL', 0)))
+        self.default_days = app.config['PROBATION_DAYS']
+        self.days_by_position = {position: int(days) for position, days
+                                 in app.config['PROBATION_DAYS_BY_POSITION'].items()}
+        self.interval = app.config['PROBATION_SWEEP_INTERVAL']
+        self._app = app
+        if self.interval > 0:
+            # Поток запускается в каждом воркере после fork, при первом запросе
+            app.before_request(self._ensure_started)
+        app.extensions['probation_sweep'] = self
+
+    def run(self, connection, today=None):
+        return sweep_probation(connection, today, self.default_days, self.days_by_position)
+
+    def _ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._loop, name='probation-sweep', daemon=True).start()
+
+    def _loop(self):
+        while True:
+            # Разброс, чтобы воркеры не просыпались одновременно
+            time.sleep(self.interval * random.uniform(0.5, 1.0))
+            try:
+                with self._app.app_context():
+                    with db.engine.begin() as connection:
+                        if not claim_sweep(connection, self.interval):
+                            continue
+                        cleared = self.run(connection)
+                self.runs += 1
+                self.cleared += cleared
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Ошибка при снятии испытательных сроков: {e}")
+
+    def stats(self):
+        return {'interval': self.interval, 'runs': self.runs, 'cleared': self.cleared, 'errors': self.errors}
+
+probation_sweep = ProbationSweep()
@@ -0,0 +1,253 @@
+from sqlalchemy import select, func, or_, and_, literal
+from models import db, Employee, fold, lower_key, SORT_KEYS
+from search_index import matching_ids
+from validation import GENDERS
+from datetime import date
+from collections import namedtuple
+import base64
+import json
+
+# Поля, по которым интерфейс позволяет сортировать список сотрудников
+SORT_FIELDS = ['full_name', 'position', 'gender', 'phone', 'email', 'hire_date', 'on_probation']
+
+# Индексированные столбцы, по которым фактически идёт сортировка
+SORT_COLUMNS = {
+    'full_name': Employee.full_name_key,
+    'position': Employee.position_key,
+    'gender': Employee.gender,
+    'phone': Employee.phone_key,
+    'email': Employee.email_key,
+    'hire_date': Employee.hire_date,
+    'on_probation': Employee.on_probation,
+}
+
+# Фильтры списка: точное значение должности, пола и испытательного срока
+# и диапазон дат приёма. Гостю доступен только фильтр по должности
+FILTER_FIELDS = ['position', 'gender', 'on_probation', 'hired_from', 'hired_to']
+PUBLIC_FILTERS = ['position']
+PROBATION_VALUES = ('true', 'false')
+
+class Pagination:
+    def __init__(self, items, page, per_page, total):
+        self.items = items
+        self.page = page
+        self.per_page = per_page
+        self.total = total
+        self.pages = (total + per_page - 1) // per_page if per_page > 0 else 1
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def has_next(self):
+        return self.page < self.pages
+
+    @property
+    def prev_num(self):
+        return self.page - 1
+
+    @property
+    def next_num(self):
+        return self.page + 1
+
+    def cursor_after(self, sort_field):
+        # Курсор после последней строки: ссылка «Показать ещё» переходит
+        # в режим курсора, и дальние страницы не требуют OFFSET
+        if not self.items:
+            return None
+        return encode_cursor(self.items[-1], normalize_sort(sort_field, 'asc')[0])
+
+# Строка страницы без привязки к сессии: такую страницу можно хранить в кэше
+EmployeeRow = namedtuple('EmployeeRow', ['id', 'full_name', 'position', 'gender', 'phone', 'email',
+                                         'on_probation', 'hire_date'])
+
+def detach_items(pagination):
+    pagination.items = [EmployeeRow(*(getattr(employee, field) for field in EmployeeRow._fields))
+                        for employee in pagination.items]
+    return pagination
+
+class KeysetPagination:
+    # Постраничный вывод по курсору: следующая страница начинается сразу
+    # после последней показанной строки, без OFFSET
+    def __init__(self, items, per_page, total, next_cursor):
+        self.items = items
+        self.per_page = per_page
+        self.total = total
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+def normalize_sort(sort_field, sort_order):
+    if sort_field not in SORT_FIELDS:
+        sort_field = 'id'
+    if sort_order != 'desc':
+        sort_order = 'asc'
+    return sort_field, sort_order
+
+def search_condition(search):
+    # По возможности ищем через полнотекстовый индекс, иначе перебором
+    ids = matching_ids(search)
+    if ids is not None:
+        return Employee.id.in_(ids)
+    search_lower = search.lower()
+    return or_(Employee.full_name_key.contains(search_lower, autoescape=True),
+               Employee.position_key.contains(search_lower, autoescape=True),
+               fold(Employee.phone).contains(search_lower, autoescape=True),
+               Employee.email_key.contains(search_lower, autoescape=True))
+
+def sort_value(employee, sort_field):
+    # Значение ключа сортировки для уже загруженной строки (нужно для курсора).
+    # У строк из кэша и снимка (EmployeeRow) ключа нет — он считается по полю
+    key = SORT_COLUMNS[sort_field].key
+    if hasattr(employee, key):
+        value = getattr(employee, key)
+    else:
+        source, normalize = SORT_KEYS[key]
+        value = normalize(getattr(employee, source))
+    if sort_field == 'hire_date':
+        return value.isoformat()
+    return value
+
+def parse_filters(args, fields=FILTER_FIELDS):
+    # Допустимые значения фильтров из параметров запроса; неверные отбрасываются
+    filters = {}
+    position = args.get('position', '').strip()
+    if 'position' in fields and position:
+        filters['position'] = position[:100]
+    if 'gender' in fields and args.get('gender') in GENDERS:
+        filters['gender'] = args['gender']
+    if 'on_probation' in fields and args.get('on_probation') in PROBATION_VALUES:
+        filters['on_probation'] = args['on_probation']
+    for field in ('hired_from', 'hired_to'):
+        if field in fields and args.get(field):
+            try:
+                filters[field] = date.fromisoformat(args[field])
+            except ValueError:
+                pass
+    return filters
+
+def filter_args(filters):
+    # Фильтры как параметры адреса: для ссылок и ключей кэша
+    return {field: value.isoformat() if isinstance(value, date) else value for field, value in filters.items()}
+
+def filter_conditions(filters, exclude=()):
+    # Каждому фильтру соответствует индекс по его столбцу. exclude — фильтры,
+    # которые не учитываются (для подсчёта вариантов этого же фильтра)
+    conditions = []
+    if 'position' in filters and 'position' not in exclude:
+        conditions.append(Employee.position_key == lower_key(filters['position']))
+    if 'gender' in filters and 'gender' not in exclude:
+        conditions.append(Employee.gender == filters['gender'])
+    if 'on_probation' in filters and 'on_probation' not in exclude:
+        # NULL в списке и в подсчёте вариантов считается «Нет»
+        if filters['on_probation'] == 'true':
+            conditions.append(Employee.on_probation.is_(True))
+        else:
+            conditions.append(or_(Employee.on_probation.is_(False), Employee.on_probation.is_(None)))
+    if 'hired_from' in filters and 'hired_from' not in exclude:
+        conditions.append(Employee.hire_date >= filters['hired_from'])
+    if 'hired_to' in filters and 'hired_to' not in exclude:
+        conditions.append(Employee.hire_date <= filters['hired_to'])
+    return conditions
+
+def filter_employees(statement, search, filters=None, exclude=()):
+    if search:
+        statement = statement.where(search_condition(search))
+    if filters:
+        statement = statement.where(*filter_conditions(filters, exclude))
+    return statement
+
+def order_employees(statement, sort_field, sort_order):
+    # Без поля сортировки выводим в порядке добавления. Порядок (ключ, id)
+    # совпадает с составным индексом, по убыванию индекс читается с конца
+    if sort_field == 'id':
+        return statement.order_by(Employee.id)
+    key = SORT_COLUMNS[sort_field]
+    if sort_order == 'desc':
+        return statement.order_by(key.desc(), Employee.id.desc())
+    return statement.order_by(key, Employee.id)
+
+def employee_query(search='', sort_field='id', sort_order='asc', columns=None, filters=None):
+    # columns — список полей, если нужны строки без создания объектов Employee
+    sort_field, sort_order = normalize_sort(sort_field, sort_order)
+    entities = [getattr(Employee, name) for name in columns] if columns else [Employee]
+    statement = filter_employees(select(*entities), search, filters)
+    return order_employees(statement, sort_field, sort_order)
+
+# Построение запросов отделено от выполнения: API (api.py) выполняет запрос
+# страницы по курсору без COUNT
+def count_statement(search='', filters=None):
+    return filter_employees(select(func.count()).select_from(Employee), search, filters)
+
+def count_employees(search='', filters=None):
+    return db.session.execute(count_statement(search, filters)).scalar()
+
+def page_statement(search='', sort_field='id', sort_order='asc', page=1, per_page=20, filters=None):
+    statement = employee_query(search, sort_field, sort_order, filters=filters)
+    return statement.limit(per_page).offset((max(page, 1) - 1) * per_page)
+
+def paginate_employees(search='', sort_field='id', sort_order='asc', page=1, per_page=20, filters=None):
+    page = max(page, 1)
+    total = count_employees(search, filters)
+    statement = page_statement(search, sort_field, sort_order, page, per_page, filters)
+    items = db.session.execute(statement).scalars().all()
+    return Pagination(items, page, per_page, total)
+
+def encode_cursor(employee, sort_field):
+    payload = [sort_value(employee, sort_field) if sort_field != 'id' else None, employee.id]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor, sort_field):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        value, last_id = json.loads(raw.decode('utf-8'))
+        if sort_field == 'hire_date':
+            value = date.fromisoformat(value)
+        return value, int(last_id)
+    except (ValueError, TypeError):
+        return None
+
+def after_condition(sort_field, sort_order, value, last_id):
+    if sort_field == 'id':
+        return Employee.id > last_id
+    key = SORT_COLUMNS[sort_field]
+    # NULL (on_probation не указан) в SQLite и MySQL меньше любого значения:
+    # по возрастанию такие строки идут первыми, по убыванию — последними.
+    # Сравнения с NULL всегда ложны, поэтому для них отдельные условия
+    if value is None:
+        if sort_order == 'desc':
+            return and_(key.is_(None), Employee.id < last_id)
+        return or_(key.is_not(None), and_(key.is_(None), Employee.id > last_id))
+    value = literal(value)
+    if sort_order == 'desc':
+        return or_(key < value, and_(key == value, Employee.id < last_id), key.is_(None))
+    return or_(key > value, and_(key == value, Employee.id > last_id))
+
+def keyset_statement(search='', sort_field='id', sort_order='asc', cursor='', per_page=20, filters=None):
+    sort_field, sort_order = normalize_sort(sort_field, sort_order)
+    statement = employee_query(search, sort_field, sort_order, filters=filters)
+    position = decode_cursor(cursor, sort_field) if cursor else None
+    if position is not None:
+        statement = statement.where(after_condition(sort_field, sort_order, *position))
+    # Берём на одну строку больше, чтобы узнать, есть ли следующая страница
+    return statement.limit(per_page + 1)
+
+def keyset_page(rows, sort_field, per_page, total):
+    sort_field, sort_order = normalize_sort(sort_field, 'asc')
+    items = rows[:per_page]
+    next_cursor = encode_cursor(items[-1], sort_field) if len(rows) > per_page else None
+    return KeysetPagination(items, per_page, total, next_cursor)
+
+def paginate_employees_after(search='', sort_field='id', sort_order='asc', cursor='', per_page=20, filters=None,
+                             total=None):
+    # total — уже известное число строк выборки (из кэша по версии данных);
+    # без него выполняется COUNT по всей выборке
+    if total is None:
+        total = count_employees(search, filters)
+    statement = keyset_statement(search, sort_field, sort_order, cursor, per_page, filters)
+    rows = db.session.execute(statement).scalars().all()
+    return keyset_page(rows, sort_field, per_page, total)
@@ -0,0 +1,196 @@
+from flask import request, session, jsonify, flash, render_template
+from werkzeug.exceptions import TooManyRequests
+from functools import wraps
+import math
+import os
+import sqlite3
+import threading
+import time
+
+# Ограничение частоты входа и изменений: «ведро» жетонов на каждый ключ (IP
+# клиента, логин, пользователь). Запрос забирает жетон, жетоны возвращаются
+# с постоянной скоростью; если ведро пустое — ответ 429 сразу, до проверки
+# пароля и запросов к базе справочника.
+#
+# Вёдра лежат в отдельном файле SQLite (RATE_LIMIT_DB), общем для всех
+# воркеров: проверка и списание — один INSERT ... ON CONFLICT DO UPDATE.
+# Если файл недоступен, запрос пропускается — ограничитель не должен
+# останавливать справочник.
+#
+# Все вёдра запроса проверяются в одной транзакции: если пустое хотя бы одно,
+# жетоны не списываются ни из одного (отказ по логину не тратит лимит IP).
+#
+# Адрес клиента — request.remote_addr. За обратным прокси нужно задать число
+# прокси в PROXY_FIX_X_FOR (см. app.py), иначе все клиенты попадут в одно ведро.
+#
+# Лимиты задаются как «число/секунды»: RATE_LIMIT_LOGIN_USER=10/60 — десять
+# попыток входа под одним логином подряд, дальше — одна в 6 секунд.
+
+DEFAULT_LIMITS = {
+    'login_ip': '30/60',
+    'login_user': '10/60',
+    'write_ip': '120/60',
+    'write_user': '60/60',
+}
+WRITE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+# Раз в столько проверок процесс удаляет полные вёдра: они не отличаются от новых
+CLEANUP_EVERY = 1000
+
+TAKE_SCRIPT = '''
+INSERT INTO rate_buckets (key, tokens, updated) VALUES (:key, :capacity - 1, :now)
+ON CONFLICT (key) DO UPDATE SET
+    tokens = min(:capacity, tokens + (:now - updated) * :rate) - 1,
+    updated = :now
+WHERE min(:capacity, tokens + (:now - updated) * :rate) >= 1
+RETURNING tokens
+'''
+
+def parse_limit(value):
+    # '10/60' -> (ёмкость 10, 10/60 жетона в секунду)
+    count, _, seconds = str(value).partition('/')
+    count, seconds = int(count), float(seconds or 1)
+    return count, count / seconds
+
+def client_ip():
+    return request.remote_addr or 'unknown'
+
+def target_login():
+    login = request.form.get('login', '').strip().lower()
+    return login or None
+
+def session_user():
+    return session.get('user_id')
+
+# Правила для маршрутов: (лимит, функция ключа); ключ None — правило не применяется
+LOGIN_LIMITS = [('login_ip', client_ip), ('login_user', target_login)]
+WRITE_LIMITS = [('write_ip', client_ip), ('write_user', session_user)]
+
+class RateLimiter:
+    def __init__(self):
+        self.enabled = True
+        self.path = None
+        self.limits = {name: parse_limit(value) for name, value in DEFAULT_LIMITS.items()}
+        self.allowed = 0
+        self.rejected = {name: 0 for name in DEFAULT_LIMITS}
+        self.errors = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('RATE_LIMIT_ENABLED', os.getenv('RATE_LIMIT_ENABLED', '1').lower() in ('1', 'true', 'yes', 'on'))
+        app.config.setdefault('RATE_LIMIT_DB', os.getenv('RATE_LIMIT_DB') or os.path.join(app.instance_path, 'rate_limit.db'))
+        for name, value in DEFAULT_LIMITS.items():
+            key = f'RATE_LIMIT_{name.upper()}'
+            app.config.setdefault(key, os.getenv(key, value))
+        self.enabled = app.config['RATE_LIMIT_ENABLED']
+        self.path = app.config['RATE_LIMIT_DB']
+        self.limits = {name: parse_limit(app.config[f'RATE_LIMIT_{name.upper()}']) for name in DEFAULT_LIMITS}
+        app.extensions['rate_limiter'] = self
+
+    def connection(self):
+        # Соединение sqlite3 своё у каждого потока
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=OFF')
+            connection.execute('CREATE TABLE IF NOT EXISTS rate_buckets '
+                               '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)')
+            self._local.connection = connection
+            self._local.calls = 0
+        return connection
+
+    def take(self, name, key, now=None):
+        # (пропустить ли запрос, через сколько секунд появится жетон)
+        capacity, rate = self.limits[name]
+        now = time.time() if now is None else now
+        connection = self.connection()
+        bucket = f'{name}:{key}'
+        row = connection.execute(TAKE_SCRIPT, {'key': bucket, 'capacity': capacity, 'rate': rate,
+                                               'now': now}).fetchone()
+        if row is not None:
+            return True, 0
+        tokens, updated = connection.execute('SELECT tokens, updated FROM rate_buckets WHERE key = ?',
+                                             (bucket,)).fetchone()
+        available = min(capacity, tokens + (now - updated) * rate)
+        return False, max(math.ceil((1 - available) / rate), 1)
+
+    def cleanup(self, connection, now):
+        # Ведро наполняется целиком за capacity / rate секунд
+        window = max(capacity / rate for capacity, rate in self.limits.values())
+        connection.execute('DELETE FROM rate_buckets WHERE updated < ?', (now - window,))
+
+    def take_all(self, buckets, now=None):
+        # Списывает по жетону из каждого ведра [(лимит, ключ)] или ни из одного.
+        # None, если все вёдра пропускают запрос, иначе (лимит, секунды до повтора)
+        now = time.time() if now is None else now
+        connection = self.connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            for name, key in buckets:
+                allowed, retry_after = self.take(name, key, now)
+                if not allowed:
+                    connection.execute('ROLLBACK')
+                    return name, retry_after
+            connection.execute('COMMIT')
+        except BaseException:
+            if connection.in_transaction:
+                connection.execute('ROLLBACK')
+            raise
+        self._local.calls += 1
+        if self._local.calls % CLEANUP_EVERY == 0:
+            self.cleanup(connection, now)
+        return None
+
+    def check(self, limits):
+        # None, если запрос можно выполнять, иначе (лимит, секунды до повтора)
+        buckets = []
+        for name, key_function in limits:
+            key = key_function()
+            if key is not None:
+                buckets.append((name, key))
+        try:
+            rejected = self.take_all(buckets)
+        except sqlite3.Error:
+            with self._lock:
+                self.errors += 1
+            rejected = None
+        with self._lock:
+            if rejected is not None:
+                self.rejected[rejected[0]] += 1
+            else:
+                self.allowed += 1
+        return rejected
+
+    def limit(self, limits, methods=WRITE_METHODS, template=None):
+        # Декоратор представления. template — страница, которая показывается
+        # с сообщением вместо стандартной страницы ошибки 429
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if self.enabled and (methods is None or request.method in methods):
+                    rejected = self.check(limits)
+                    if rejected is not None:
+                        return self.rejected_response(rejected[1], template)
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def rejected_response(self, retry_after, template):
+        message = f'Слишком много запросов, повторите через {retry_after} с'
+        headers = {'Retry-After': str(retry_after)}
+        if request.blueprint == 'api':
+            return jsonify({'error': message}), 429, headers
+        if template is not None:
+            flash(message, 'error')
+            return render_template(template), 429, headers
+        raise TooManyRequests(message, retry_after=retry_after)
+
+    def stats(self):
+        with self._lock:
+            stats = {'allowed': self.allowed, 'errors': self.errors}
+            stats.update({f'rejected_{name}': value for name, value in self.rejected.items()})
+        return stats
+
+rate_limiter = RateLimiter()
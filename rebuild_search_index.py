@@ -0,0 +1,11 @@
+from app import app, db
+from search_index import rebuild_search_index
+
+def rebuild():
+    with app.app_context():
+        with db.engine.begin() as connection:
+            rebuild_search_index(connection)
+        print("Поисковый индекс сотрудников перестроен!")
+
+if __name__ == '__main__':
+    rebuild()
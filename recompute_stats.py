@@ -0,0 +1,21 @@
+from app import app, db
+from employee_stats import verify_stats, recompute_stats
+import sys
+
+def recompute(check_only=False):
+    # Сверяет счётчики с пересчётом по таблице employees и перезаписывает их
+    with app.app_context():
+        with db.engine.begin() as connection:
+            mismatches = verify_stats(connection)
+            for dimension, value, stored, expected in mismatches:
+                print(f"⚠️ {dimension} «{value}»: хранится {stored}, должно быть {expected}")
+            if not mismatches:
+                print("✅ Статистика сотрудников совпадает с данными")
+            elif not check_only:
+                recompute_stats(connection)
+                print("✅ Статистика сотрудников пересчитана")
+    return mismatches
+
+if __name__ == '__main__':
+    check_only = '--check' in sys.argv
+    sys.exit(1 if recompute(check_only) and check_only else 0)
@@ -0,0 +1,25 @@
+from app import app, db
+from models import Employee
+from duplicates import duplicate_report
+from schema import create_indexes
+import sys
+
+def report():
+    # Повторяющиеся email и телефоны в уже сохранённых данных. Когда повторов
+    # нет, создаются уникальные индексы, пропущенные при обновлении схемы
+    with app.app_context():
+        with db.engine.begin() as connection:
+            duplicates = duplicate_report(connection)
+            for item in duplicates:
+                ids = ', '.join(str(employee_id) for employee_id in item['ids'])
+                print(f"⚠️ {item['field']} «{item['value']}»: {item['count']} сотрудника, id: {ids}")
+            if duplicates:
+                print(f"❌ Найдено повторов: {len(duplicates)}")
+            else:
+                print("✅ Повторяющихся email и телефонов нет")
+                for name in create_indexes(connection, Employee.__table__):
+                    print(f"✅ Создан индекс {name}")
+    return duplicates
+
+if __name__ == '__main__':
+    sys.exit(1 if report() else 0)
@@ -0,0 +1,81 @@
+from sqlalchemy import inspect, select, text, update, bindparam, func
+from models import Employee, SORT_KEYS, sort_key_values
+from contextlib import contextmanager
+
+# Обновление структуры существующей базы: db.create_all() создаёт только
+# недостающие таблицы, но не добавляет новые столбцы и индексы в старые
+
+def add_missing_columns(connection, table, names):
+    existing = {c['name'] for c in inspect(connection).get_columns(table.name)}
+    added = []
+    for name in names:
+        if name in existing:
+            continue
+        column = table.c[name]
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(text(
+            f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type} NOT NULL DEFAULT ''"))
+        added.append(name)
+    return added
+
+def backfill_sort_keys(connection, batch_size=1000):
+    sources = sorted({source for source, normalize in SORT_KEYS.values()})
+    statement = (update(Employee.__table__)
+                 .where(Employee.__table__.c.id == bindparam('employee_id'))
+                 .values({key: bindparam(key) for key in SORT_KEYS}))
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            select(Employee.__table__.c.id, *[Employee.__table__.c[name] for name in sources])
+            .where(Employee.__table__.c.id > last_id)
+            .order_by(Employee.__table__.c.id)
+            .limit(batch_size)).mappings().all()
+        if not rows:
+            break
+        connection.execute(statement, [dict(sort_key_values(row), employee_id=row['id']) for row in rows])
+        last_id = rows[-1]['id']
+
+def has_duplicates(connection, table, names):
+    columns = [table.c[name] for name in names]
+    statement = select(*columns).group_by(*columns).having(func.count() > 1).limit(1)
+    return connection.execute(statement).first() is not None
+
+def create_indexes(connection, table):
+    # Уникальный индекс по столбцу с повторами создать нельзя: такой индекс
+    # пропускается, повторы показывает report_duplicates.py
+    existing = {index['name'] for index in inspect(connection).get_indexes(table.name)}
+    created = []
+    for index in table.indexes:
+        if index.name in existing:
+            continue
+        names = [column.name for column in index.columns]
+        if index.unique and has_duplicates(connection, table, names):
+            print(f"⚠️ Индекс {index.name} не создан: в {', '.join(names)} есть повторы")
+            continue
+        index.create(connection)
+        created.append(index.name)
+    return created
+
+def upgrade_schema(connection):
+    table = Employee.__table__
+    added = add_missing_columns(connection, table, list(SORT_KEYS))
+    if added:
+        backfill_sort_keys(connection)
+        print(f"✅ Добавлены столбцы сортировки: {', '.join(added)}")
+    create_indexes(connection, table)
+
+@contextmanager
+def deferred_indexes(connection, table, enabled=True):
+    # Для загрузки большого объёма: вторичные индексы удаляются и строятся
+    # заново одной сортировкой после вставки. DDL выполняется в той же
+    # транзакции, так что при откате индексы останутся на месте
+    if not enabled:
+        yield
+        return
+    for index in table.indexes:
+        index.drop(connection, checkfirst=True)
+    try:
+        yield
+    finally:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
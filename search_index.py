@@ -0,0 +1,138 @@
+from sqlalchemy import event, text, select, func, literal_column, table, column
+from sqlalchemy.exc import OperationalError
+from models import db, Employee
+from contextlib import contextmanager
+
+# Полнотекстовый индекс для поиска сотрудников (только SQLite).
+# FTS5 с токенизатором trigram находит подстроку по индексу, а не перебором
+# строк, и приводит к нижнему регистру в том числе кириллицу. Индекс хранит
+# только триграммы: сами значения берутся из таблицы employees, а актуальность
+# поддерживают триггеры, поэтому массовые INSERT/UPDATE/DELETE тоже учитываются.
+SEARCH_TABLE = 'employee_search'
+SEARCH_COLUMNS = ['full_name', 'position', 'phone', 'email']
+
+# Триграммы не строятся для запросов короче трёх символов
+MIN_QUERY_LENGTH = 3
+
+# Настройки слияния сегментов FTS5 по умолчанию
+DEFAULT_MERGE_SETTINGS = {'automerge': 4, 'crisismerge': 16}
+# На время массовой загрузки сегменты не сливаются
+BULK_MERGE_SETTINGS = {'automerge': 0, 'crisismerge': 2000}
+
+_columns = ', '.join(SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{name}' for name in SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{name}' for name in SEARCH_COLUMNS)
+
+CREATE_STATEMENTS = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        {_columns}, content='employees', content_rowid='id', tokenize='trigram', columnsize=0)""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert AFTER INSERT ON employees BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete AFTER DELETE ON employees BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update AFTER UPDATE OF {_columns} ON employees BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {_columns}) VALUES ('delete', old.id, {_old_values});
+        INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) VALUES (new.id, {_new_values});
+    END""",
+]
+
+_search_table = table(SEARCH_TABLE, column('rowid'))
+
+# Кэш проверки наличия индекса в подключенной базе: ключ — URL движка
+_available = {}
+
+def search_index_exists(connection):
+    row = connection.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': SEARCH_TABLE}).first()
+    return row is not None
+
+def create_search_index(connection):
+    # Возвращает True, если индекс создан заново и его нужно заполнить
+    if connection.dialect.name != 'sqlite':
+        return False
+    existed = search_index_exists(connection)
+    try:
+        for statement in CREATE_STATEMENTS:
+            connection.execute(text(statement))
+    except OperationalError as e:
+        # Сборка SQLite без FTS5/trigram: поиск будет работать без индекса
+        print(f"⚠️ Полнотекстовый индекс недоступен: {e}")
+        return False
+    return not existed
+
+def rebuild_search_index(connection):
+    # Полностью перестраивает индекс по текущему содержимому таблицы employees
+    create_search_index(connection)
+    connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+    _available.pop(str(connection.engine.url), None)
+
+def drop_search_index(connection):
+    if connection.dialect.name == 'sqlite':
+        for name in ('insert', 'delete', 'update'):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_{name}"))
+        connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+    _available.pop(str(connection.engine.url), None)
+
+def set_merge_settings(connection, settings):
+    for name, value in settings.items():
+        connection.execute(text(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES (:name, :value)"),
+            {'name': name, 'value': value})
+
+@contextmanager
+def deferred_indexing(connection):
+    # Для массовой вставки: построчный триггер FTS5 во много раз медленнее,
+    # чем одна вставка INSERT ... SELECT по всем новым строкам. Триггер
+    # снимается внутри той же транзакции, поэтому при откате он вернётся
+    if connection.dialect.name != 'sqlite' or not search_index_exists(connection):
+        yield
+        return
+    last_id = connection.execute(select(func.max(Employee.id))).scalar() or 0
+    connection.execute(text(f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert"))
+    try:
+        yield
+    finally:
+        # Пока идёт вставка, сегменты индекса не сливаются: слияние большого
+        # объёма во время загрузки замедляет её в разы
+        set_merge_settings(connection, BULK_MERGE_SETTINGS)
+        connection.execute(text(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, {_columns}) "
+            f"SELECT id, {_columns} FROM employees WHERE id > :last_id"), {'last_id': last_id})
+        set_merge_settings(connection, DEFAULT_MERGE_SETTINGS)
+        connection.execute(text(CREATE_STATEMENTS[1]))
+
+@event.listens_for(Employee.__table__, 'after_create')
+def _create_with_table(target, connection, **kw):
+    create_search_index(connection)
+
+@event.listens_for(Employee.__table__, 'before_drop')
+def _drop_with_table(target, connection, **kw):
+    drop_search_index(connection)
+
+def search_index_key():
+    # Ключ кэша для текущей базы или None, если база не SQLite
+    bind = db.session.get_bind()
+    return str(bind.url) if bind.dialect.name == 'sqlite' else None
+
+def search_index_available():
+    key = search_index_key()
+    if key is None:
+        return False
+    if key not in _available:
+        _available[key] = search_index_exists(db.session.connection())
+    return _available[key]
+
+def match_phrase(search):
+    # Запрос как одна фраза FTS5: совпадение подстроки внутри одного поля
+    return '"' + search.replace('"', '""') + '"'
+
+def matching_ids(search):
+    # Подзапрос с id сотрудников, найденных по индексу, или None,
+    # если индекс не может обработать этот запрос
+    if len(search) < MIN_QUERY_LENGTH or not search_index_available():
+        return None
+    return select(_search_table.c.rowid).where(
+        literal_column(SEARCH_TABLE).op('MATCH')(match_phrase(search)))
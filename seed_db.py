@@ -0,0 +1,226 @@
+from app import app, db
+from bootstrap import bootstrap
+from models import Employee, sort_key_values, lower_key, digits_key
+from schema import deferred_indexes
+from search_index import deferred_indexing
+from data_version import bump_data_version
+from employee_stats import recompute_stats
+from employee_changes import record_inserts
+from sqlalchemy import insert, select, func
+from datetime import date, datetime
+import argparse
+import itertools
+import random
+import time
+
+# Генератор синтетических сотрудников для нагрузочного тестирования.
+# Результат полностью определяется параметром seed и номером первой строки.
+
+MALE_NAMES = ['Александр', 'Дмитрий', 'Максим', 'Сергей', 'Андрей', 'Алексей', 'Артём', 'Илья',
+              'Кирилл', 'Михаил', 'Никита', 'Матвей', 'Роман', 'Егор', 'Арсений', 'Иван', 'Денис',
+              'Евгений', 'Даниил', 'Тимофей', 'Владислав', 'Игорь', 'Владимир', 'Павел', 'Руслан',
+              'Марк', 'Константин', 'Тимур', 'Олег', 'Ярослав', 'Антон', 'Николай', 'Глеб', 'Данил',
+              'Савелий', 'Вадим', 'Степан', 'Юрий', 'Богдан', 'Артур', 'Семён', 'Макар', 'Лев',
+              'Виктор', 'Елисей', 'Виталий', 'Вячеслав', 'Захар', 'Мирон', 'Дамир']
+FEMALE_NAMES = ['Анастасия', 'Мария', 'Анна', 'Виктория', 'Екатерина', 'Наталья', 'Марина', 'Полина',
+                'София', 'Дарья', 'Алиса', 'Ксения', 'Александра', 'Елена', 'Ольга', 'Татьяна',
+                'Ирина', 'Юлия', 'Светлана', 'Валерия', 'Вероника', 'Арина', 'Алёна', 'Кристина',
+                'Ангелина', 'Елизавета', 'Варвара', 'Милана', 'Ева', 'Василиса', 'Людмила', 'Галина',
+                'Надежда', 'Любовь', 'Валентина', 'Оксана', 'Нина', 'Яна', 'Диана', 'Алина', 'Маргарита',
+                'Ульяна', 'Таисия', 'Кира', 'Евгения', 'Вера', 'Зоя', 'Лидия', 'Софья', 'Майя']
+# Отчества: мужская и женская форма
+PATRONYMICS = [('Александрович', 'Александровна'), ('Сергеевич', 'Сергеевна'), ('Дмитриевич', 'Дмитриевна'),
+               ('Андреевич', 'Андреевна'), ('Алексеевич', 'Алексеевна'), ('Владимирович', 'Владимировна'),
+               ('Михайлович', 'Михайловна'), ('Николаевич', 'Николаевна'), ('Игоревич', 'Игоревна'),
+               ('Викторович', 'Викторовна'), ('Евгеньевич', 'Евгеньевна'), ('Олегович', 'Олеговна'),
+               ('Павлович', 'Павловна'), ('Юрьевич', 'Юрьевна'), ('Иванович', 'Ивановна'),
+               ('Петрович', 'Петровна'), ('Васильевич', 'Васильевна'), ('Анатольевич', 'Анатольевна'),
+               ('Геннадьевич', 'Геннадьевна'), ('Валерьевич', 'Валерьевна'),
+               ('Романович', 'Романовна'), ('Константинович', 'Константиновна'), ('Максимович', 'Максимовна'),
+               ('Артёмович', 'Артёмовна'), ('Денисович', 'Денисовна'), ('Борисович', 'Борисовна'),
+               ('Григорьевич', 'Григорьевна'), ('Степанович', 'Степановна'), ('Фёдорович', 'Фёдоровна')]
+# Фамилии в мужской форме; женская образуется окончанием
+SURNAMES = ['Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов',
+            'Новиков', 'Фёдоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семёнов', 'Егоров',
+            'Павлов', 'Козлов', 'Степанов', 'Николаев', 'Орлов', 'Андреев', 'Макаров', 'Никитин',
+            'Захаров', 'Зайцев', 'Соловьёв', 'Борисов', 'Яковлев', 'Григорьев', 'Романов', 'Воробьёв',
+            'Сергеев', 'Кузьмин', 'Фролов', 'Александров', 'Дмитриев', 'Королёв', 'Гусев', 'Киселёв',
+            'Ильин', 'Максимов', 'Поляков', 'Сорокин', 'Виноградов', 'Ковалёв', 'Белов', 'Медведев',
+            'Антонов', 'Тарасов', 'Жуков', 'Баранов', 'Филиппов', 'Комаров', 'Давыдов', 'Беляев',
+            'Герасимов', 'Богданов', 'Осипов', 'Сидоров', 'Матвеев', 'Титов', 'Марков', 'Миронов',
+            'Крылов', 'Куликов', 'Карпов', 'Власов', 'Мельников', 'Денисов', 'Гаврилов', 'Тихонов',
+            'Казаков', 'Афанасьев', 'Данилов', 'Савельев', 'Тимофеев', 'Фомин', 'Чернов', 'Абрамов',
+            'Мартынов', 'Ефимов', 'Федотов', 'Щербаков', 'Назаров', 'Калинин', 'Исаев', 'Чернышёв',
+            'Быков', 'Маслов', 'Родионов', 'Коновалов', 'Лазарев', 'Воронин', 'Климов', 'Филатов',
+            'Пономарёв', 'Голубев', 'Кудрявцев', 'Прохоров', 'Наумов', 'Потапов', 'Журавлёв', 'Овчинников',
+            'Трофимов', 'Леонов', 'Соболев', 'Ермаков', 'Колесников', 'Гончаров', 'Емельянов', 'Никифоров',
+            'Грачёв', 'Котов', 'Гришин', 'Ефремов', 'Архипов', 'Громов', 'Кириллов', 'Малышев', 'Панов',
+            'Моисеев', 'Румянцев', 'Акимов', 'Кондратьев', 'Бирюков', 'Горбунов', 'Анисимов', 'Ерёмин',
+            'Тихомиров', 'Галкин', 'Лукьянов', 'Михеев', 'Скворцов', 'Юдин', 'Белоусов', 'Нестеров',
+            'Симонов', 'Прокофьев', 'Харитонов', 'Князев', 'Цветков', 'Левин', 'Митрофанов', 'Воронов',
+            'Аксёнов', 'Софронов', 'Мальцев', 'Логинов', 'Горшков', 'Савин', 'Краснов', 'Майоров',
+            'Демидов', 'Елисеев', 'Рыбаков', 'Сафонов', 'Плотников', 'Дёмин', 'Хохлов', 'Жданов',
+            'Островский', 'Вишневский', 'Литвинов', 'Зуев', 'Бондарев', 'Шевцов', 'Блинов', 'Полевой']
+# Должности и их доля в штате
+POSITIONS = [('Разработчик', 30), ('Старший разработчик', 12), ('Тестировщик', 10), ('Аналитик', 8),
+             ('Менеджер по продажам', 8), ('Специалист поддержки', 8), ('Дизайнер', 4), ('Маркетолог', 4),
+             ('Бухгалтер', 4), ('Системный администратор', 3), ('DevOps-инженер', 3), ('Менеджер проектов', 3),
+             ('Руководитель группы', 3), ('Специалист по кадрам', 2), ('Офис-менеджер', 2), ('Юрист', 2),
+             ('Главный бухгалтер', 1), ('Начальник отдела', 1), ('Заместитель директора', 0.2), ('Директор', 0.05)]
+
+TRANSLIT = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'e', 'ж': 'zh', 'з': 'z',
+    'и': 'i', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r',
+    'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts', 'ч': 'ch', 'ш': 'sh', 'щ': 'shch',
+    'ъ': '', 'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+})
+
+EMAIL_DOMAINS = [('company.com', 85), ('company.ru', 10), ('hr.company.com', 5)]
+
+START_DATE = date(2000, 1, 1)
+PROBATION_DAYS = 90
+
+# Даты приёма отсчитываются от фиксированного дня, чтобы при одном и том же
+# seed база получалась одинаковой в любой день запуска
+REFERENCE_DATE = date(2025, 1, 1)
+
+def zipf_weights(size, exponent=0.8):
+    # Частые имена и фамилии встречаются заметно чаще редких
+    return [1 / (rank + 1) ** exponent for rank in range(size)]
+
+def female_surname(surname):
+    if surname.endswith('ский'):
+        return surname[:-4] + 'ская'
+    if surname.endswith('ой'):
+        return surname[:-2] + 'ая'
+    if surname.endswith(('ов', 'ев', 'ёв', 'ин')):
+        return surname + 'а'
+    return surname
+
+def cumulative(weights):
+    return list(itertools.accumulate(weights))
+
+def phone_number(number):
+    # Уникальный для каждого номера строки мобильный телефон: умножение на
+    # взаимно простое с 10^9 число перемешивает номера без повторов
+    digits = '9' + f'{(number * 387420489 + 123456789) % 10 ** 9:09d}'
+    return f'+7-{digits[:3]}-{digits[3:6]}-{digits[6:8]}-{digits[8:]}'
+
+def generate_employees(count, seed=42, start=0, today=REFERENCE_DATE, block_size=10000):
+    # Кортежи (full_name, position, gender, phone, email, on_probation, hire_date);
+    # start — номер первой строки, чтобы телефоны и email не повторялись
+    rng = random.Random(seed)
+    today_ordinal = today.toordinal()
+    span = today_ordinal - START_DATE.toordinal()
+
+    male_weights = cumulative(zipf_weights(len(MALE_NAMES)))
+    female_weights = cumulative(zipf_weights(len(FEMALE_NAMES)))
+    surname_weights = cumulative(zipf_weights(len(SURNAMES)))
+    patronymic_weights = cumulative(zipf_weights(len(PATRONYMICS), 0.6))
+    positions = [position for position, weight in POSITIONS]
+    position_weights = cumulative([weight for position, weight in POSITIONS])
+    domains = [domain for domain, weight in EMAIL_DOMAINS]
+    domain_weights = cumulative([weight for domain, weight in EMAIL_DOMAINS])
+    surname_indexes = range(len(SURNAMES))
+    male_surnames = [(surname, surname.lower().translate(TRANSLIT)) for surname in SURNAMES]
+    female_surnames = [(female_surname(surname), female_surname(surname).lower().translate(TRANSLIT))
+                       for surname in SURNAMES]
+    initials = {name: name[0].lower().translate(TRANSLIT) for name in MALE_NAMES + FEMALE_NAMES}
+
+    # Значения выбираются блоками: один вызов choices на блок вместо вызова на строку
+    for block_start in range(start, start + count, block_size):
+        size = min(block_size, start + count - block_start)
+        surnames = rng.choices(surname_indexes, cum_weights=surname_weights, k=size)
+        patronymics = rng.choices(PATRONYMICS, cum_weights=patronymic_weights, k=size)
+        male_names = rng.choices(MALE_NAMES, cum_weights=male_weights, k=size)
+        female_names = rng.choices(FEMALE_NAMES, cum_weights=female_weights, k=size)
+        block_positions = rng.choices(positions, cum_weights=position_weights, k=size)
+        block_domains = rng.choices(domains, cum_weights=domain_weights, k=size)
+
+        for offset in range(size):
+            number = block_start + offset
+            if rng.random() < 0.52:
+                gender = 'male'
+                name = male_names[offset]
+                surname, login = male_surnames[surnames[offset]]
+                patronymic = patronymics[offset][0]
+            else:
+                gender = 'female'
+                name = female_names[offset]
+                surname, login = female_surnames[surnames[offset]]
+                patronymic = patronymics[offset][1]
+
+            # Стаж распределён экспоненциально: недавно принятых больше
+            days_ago = min(int(rng.expovariate(1 / 1500)), span)
+            on_probation = rng.random() < (0.9 if days_ago < PROBATION_DAYS else 0.02)
+
+            yield (f'{surname} {name} {patronymic}', block_positions[offset], gender, phone_number(number),
+                   f'{login}.{initials[name]}{number}@{block_domains[offset]}', on_probation,
+                   date.fromordinal(today_ordinal - days_ago))
+
+SQLITE_INSERT = ('INSERT INTO employees (full_name, position, gender, phone, email, on_probation, hire_date, '
+                 'created_at, full_name_key, position_key, email_key, phone_key) '
+                 'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)')
+FIELDS = ['full_name', 'position', 'gender', 'phone', 'email', 'on_probation', 'hire_date']
+
+def insert_chunk(connection, rows, created_at):
+    if connection.dialect.name == 'sqlite':
+        # Драйвер sqlite3 напрямую: без обработки типов SQLAlchemy вставка в разы быстрее
+        created = created_at.strftime('%Y-%m-%d %H:%M:%S.%f')
+        connection.exec_driver_sql(SQLITE_INSERT, [
+            (full_name, position, gender, phone, email, int(on_probation), hire_date.isoformat(), created,
+             lower_key(full_name), lower_key(position), lower_key(email), digits_key(phone))
+            for full_name, position, gender, phone, email, on_probation, hire_date in rows])
+    else:
+        values = [dict(zip(FIELDS, row), created_at=created_at) for row in rows]
+        for row in values:
+            row.update(sort_key_values(row))
+        connection.execute(insert(Employee.__table__), values)
+
+def seed_employees(count, seed=42, chunk_size=10000, today=REFERENCE_DATE):
+    with app.app_context():
+        connection = db.session.connection()
+        start, existing = connection.execute(select(func.max(Employee.id), func.count())).one()
+        start = start or 0
+        created_at = datetime.utcnow()
+        rows = generate_employees(count, seed, start, today)
+        # Если строк добавляется больше, чем уже есть, индексы быстрее
+        # построить заново после вставки, чем обновлять на каждой строке
+        rebuild = count >= existing
+        with deferred_indexes(connection, Employee.__table__, enabled=rebuild), \
+                deferred_indexing(connection):
+            while True:
+                chunk = list(itertools.islice(rows, chunk_size))
+                if not chunk:
+                    break
+                insert_chunk(connection, chunk, created_at)
+        # Один пересчёт по GROUP BY дешевле, чем счётчики на каждой строке
+        recompute_stats(connection)
+        record_inserts(connection, start)
+        bump_data_version(connection)
+        db.session.commit()
+
+def main():
+    parser = argparse.ArgumentParser(description='Заполнение базы синтетическими сотрудниками')
+    parser.add_argument('count', type=int, help='сколько сотрудников создать')
+    parser.add_argument('--seed', type=int, default=42, help='зерно генератора (по умолчанию 42)')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='размер порции вставки')
+    parser.add_argument('--today', type=date.fromisoformat, default=REFERENCE_DATE,
+                        help=f'день, от которого отсчитываются даты приёма (по умолчанию {REFERENCE_DATE})')
+    parser.add_argument('--reset', action='store_true', help='пересоздать таблицы перед заполнением')
+    args = parser.parse_args()
+
+    if args.reset:
+        with app.app_context():
+            db.drop_all()
+        # Структура и пользователи для входа; тестовые сотрудники не добавляются
+        bootstrap(app, sample_employees=False)
+        print("База данных пересоздана!")
+
+    started = time.perf_counter()
+    seed_employees(args.count, args.seed, args.chunk_size, args.today)
+    elapsed = time.perf_counter() - started
+    print(f"Создано {args.count} сотрудников за {elapsed:.1f} с")
+
+if __name__ == '__main__':
+    main()
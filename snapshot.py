@@ -0,0 +1,371 @@
+from sqlalchemy import select
+from models import db, Employee, DataVersion
+from queries import Pagination, EmployeeRow, SORT_FIELDS, SORT_COLUMNS, normalize_sort
+from data_version import EMPLOYEES
+from array import array
+from datetime import date
+import bisect
+import glob
+import json
+import mmap
+import os
+import shutil
+import subprocess
+import sys
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Снимок справочника для чтения списка сотрудников без запросов к базе и без
+# объектов Employee. Столбцы хранятся массивами в одном файле, который каждый
+# воркер отображает в память (mmap): страницы файла общие для всех процессов,
+# своя у воркера только небольшая шапка.
+#
+# Файл строится по одной версии данных (employees-<версия>.snap) и не меняется.
+# Когда версия уходит вперёд, воркер запускает сборку нового файла отдельным
+# процессом, а до тех пор список читается из базы как обычно. Снимок не
+# обновляется по изменениям, а строится заново целиком, поэтому после каждой
+# правки список какое-то время идёт из базы. Сборка начинается через
+# SNAPSHOT_BUILD_DELAY секунд после первого промаха и берёт последнюю версию:
+# серия правок подряд даёт одну сборку, а не по сборке на правку.
+#
+# Содержимое файла: 8 байт сигнатуры, длина и JSON-описание разделов, затем
+# разделы — массивы array(typecode):
+#   id                                 id сотрудников по возрастанию (строка = позиция)
+#   <поле>_offsets, <поле>_data        строки поля подряд в UTF-8 и их границы
+#   <поле>_index                       для повторяющихся полей — номер значения в словаре
+#   on_probation, hire_date            флаг (-1 — не указан) и номер дня (date.toordinal)
+#   order_<поле>, rank_<поле>          порядок строк по (ключ, id) и место строки в нём
+#   search_offsets, search_data        ФИО, должность, телефон и email в нижнем
+#                                      регистре через \0 — подстрока ищется mmap.find
+
+MAGIC = b'EMPSNAP1'
+TEXT_FIELDS = ['full_name', 'phone', 'email']
+# Поля с небольшим числом разных значений: строка хранит номер значения
+INTERNED_FIELDS = ['position', 'gender']
+SEARCH_FIELDS = ['full_name', 'position', 'phone', 'email']
+SEPARATOR = b'\x00'
+
+BUILD_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'build_snapshot.py')
+DEFAULT_BUILD_DELAY = 5
+
+def python_executable():
+    # Под uWSGI sys.executable — сам uwsgi, а не интерпретатор
+    if os.path.basename(sys.executable).startswith('python'):
+        return sys.executable
+    return shutil.which('python3') or shutil.which('python') or sys.executable
+
+def snapshot_path(directory, version):
+    return os.path.join(directory, f'employees-{version}.snap')
+
+class StringColumn:
+    # Строки подряд в UTF-8 и границы каждой: offsets[i]..offsets[i + 1]
+    def __init__(self):
+        self.offsets = array('q', [0])
+        self.data = bytearray()
+
+    def append(self, value):
+        self.data += value.encode('utf-8')
+        self.offsets.append(len(self.data))
+
+def write_snapshot(path, version, sections):
+    header = {'version': version, 'sections': {}}
+    position = 0
+    for name, (typecode, values) in sections.items():
+        size = len(values) * (values.itemsize if isinstance(values, array) else 1)
+        header['sections'][name] = [typecode, position, size]
+        position += size + (-size % 8)
+    raw_header = json.dumps(header).encode('utf-8')
+    raw_header += b' ' * (-(len(MAGIC) + 8 + len(raw_header)) % 8)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(MAGIC)
+        f.write(len(raw_header).to_bytes(8, 'little'))
+        f.write(raw_header)
+        for name, (typecode, values) in sections.items():
+            # Без копирования: array и bytearray пишутся через буфер
+            data = memoryview(values).cast('B')
+            f.write(data)
+            f.write(b'\x00' * (-len(data) % 8))
+    # Готовый файл появляется под своим именем целиком
+    os.replace(temporary, path)
+def probation_flag(value):
+    # NULL хранится как -1: порядок строк в снимке тот же, что и в базе,
+    # и курсор по строке снимка продолжает выборку с того же места
+    return None if value < 0 else bool(value)
+
+def build_sections(connection):
+    # Все столбцы одним проходом по таблице в порядке id; строки сразу
+    # кодируются в общий буфер, без списка объектов на всю таблицу
+    table = Employee.__table__
+    columns = [table.c.id, table.c.on_probation, table.c.hire_date] + \
+        [table.c[field] for field in TEXT_FIELDS + INTERNED_FIELDS]
+    ids = array('q')
+    on_probation = array('b')
+    hire_dates = array('i')
+    texts = {field: StringColumn() for field in TEXT_FIELDS}
+    dictionaries = {field: {} for field in INTERNED_FIELDS}
+    indexes = {field: array('i') for field in INTERNED_FIELDS}
+    search = StringColumn()
+
+    result = connection.execution_options(yield_per=10000).execute(select(*columns).order_by(table.c.id))
+    for row in result:
+        ids.append(row.id)
+        on_probation.append(-1 if row.on_probation is None else int(row.on_probation))
+        hire_dates.append(row.hire_date.toordinal())
+        for field in TEXT_FIELDS:
+            texts[field].append(getattr(row, field))
+        for field in INTERNED_FIELDS:
+            value = getattr(row, field)
+            indexes[field].append(dictionaries[field].setdefault(value, len(dictionaries[field])))
+        search.append('\x00'.join(getattr(row, field).lower() for field in SEARCH_FIELDS) + '\x00')
+
+    sections = {'id': ('q', ids), 'on_probation': ('b', on_probation), 'hire_date': ('i', hire_dates)}
+    for field in TEXT_FIELDS:
+        sections[f'{field}_offsets'] = ('q', texts[field].offsets)
+        sections[f'{field}_data'] = ('B', texts[field].data)
+    for field in INTERNED_FIELDS:
+        values = StringColumn()
+        for value in dictionaries[field]:
+            values.append(value)
+        sections[f'{field}_offsets'] = ('q', values.offsets)
+        sections[f'{field}_data'] = ('B', values.data)
+        sections[f'{field}_index'] = ('i', indexes[field])
+    sections['search_offsets'] = ('q', search.offsets)
+    sections['search_data'] = ('B', search.data)
+
+    # Порядок по каждому полю сортировки читается из базы по его индексу
+    rows_by_id = array('i', [-1]) * ((ids[-1] + 1) if ids else 1)
+    for row, employee_id in enumerate(ids):
+        rows_by_id[employee_id] = row
+    for field in SORT_FIELDS:
+        statement = select(table.c.id).order_by(SORT_COLUMNS[field], table.c.id)
+        order = array('i', (rows_by_id[employee_id] for employee_id in connection.execute(statement).scalars()))
+        rank = array('i', bytes(4 * len(order)))
+        for position, row in enumerate(order):
+            rank[row] = position
+        sections[f'order_{field}'] = ('i', order)
+        sections[f'rank_{field}'] = ('i', rank)
+    return sections
+
+class Snapshot:
+    # Открытый файл снимка: разделы — представления memoryview над mmap без копирования
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Не файл снимка: {path}")
+        header_size = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 8], 'little')
+        start = len(MAGIC) + 8
+        header = json.loads(self._mmap[start:start + header_size])
+        base = start + header_size
+        view = memoryview(self._mmap)
+        self.version = header['version']
+        self.path = path
+        self.sections = {}
+        for name, (typecode, offset, size) in header['sections'].items():
+            self.sections[name] = view[base + offset:base + offset + size].cast(typecode)
+            if name == 'search_data':
+                self._search_bounds = (base + offset, base + offset + size)
+        self.count = len(self.sections['id'])
+        self.size = len(self._mmap)
+
+    def text(self, field, index):
+        offsets = self.sections[f'{field}_offsets']
+        return bytes(self.sections[f'{field}_data'][offsets[index]:offsets[index + 1]]).decode('utf-8')
+
+    def value(self, field, row):
+        if field in INTERNED_FIELDS:
+            return self.text(field, self.sections[f'{field}_index'][row])
+        return self.text(field, row)
+
+    def employee(self, row):
+        return EmployeeRow(
+            id=self.sections['id'][row],
+            full_name=self.value('full_name', row),
+            position=self.value('position', row),
+            gender=self.value('gender', row),
+            phone=self.value('phone', row),
+            email=self.value('email', row),
+            on_probation=probation_flag(self.sections['on_probation'][row]),
+            hire_date=date.fromordinal(self.sections['hire_date'][row]))
+
+    def matching_rows(self, search):
+        # Строки, в одном из полей которых есть подстрока, по возрастанию id.
+        # Поиск идёт прямо по отображённому файлу: mmap.find без копирования
+        needle = search.lower().encode('utf-8')
+        if SEPARATOR in needle:
+            return []
+        offsets = self.sections['search_offsets']
+        base, end = self._search_bounds
+        find = self._mmap.find
+        locate = bisect.bisect_right
+        rows = []
+        row = 0
+        position = find(needle, base, end)
+        while position != -1:
+            row = locate(offsets, position - base, row) - 1
+            rows.append(row)
+            # Остаток найденной строки пропускается: одно совпадение на сотрудника
+            row += 1
+            position = find(needle, base + offsets[row], end)
+        return rows
+
+    def ordered_rows(self, rows, sort_field, descending, limit):
+        # Первые limit найденных строк в порядке сортировки. Немного строк
+        # проще отсортировать по месту в порядке, много — выбрать из порядка
+        if len(rows) * 8 < self.count:
+            rows.sort(key=self.sections[f'rank_{sort_field}'].__getitem__, reverse=descending)
+            return rows[:limit]
+        matched = bytearray(self.count)
+        for row in rows:
+            matched[row] = 1
+        order = self.sections[f'order_{sort_field}']
+        positions = range(self.count - 1, -1, -1) if descending else range(self.count)
+        selected = []
+        for position in positions:
+            row = order[position]
+            if matched[row]:
+                selected.append(row)
+                if len(selected) == limit:
+                    break
+        return selected
+
+    def page(self, search, sort_field, sort_order, page, per_page):
+        sort_field, sort_order = normalize_sort(sort_field, sort_order)
+        page = max(page, 1)
+        start = (page - 1) * per_page
+        if search:
+            rows = self.matching_rows(search)
+            total = len(rows)
+            # Без поля сортировки список всегда по возрастанию id, как и в базе
+            if sort_field != 'id':
+                rows = self.ordered_rows(rows, sort_field, sort_order == 'desc', start + per_page)
+            selected = rows[start:start + per_page]
+        else:
+            total = self.count
+            order = self.sections[f'order_{sort_field}'] if sort_field != 'id' else range(total)
+            if sort_order == 'desc' and sort_field != 'id':
+                selected = [order[total - 1 - index] for index in range(start, min(start + per_page, total))]
+            else:
+                selected = [order[index] for index in range(start, min(start + per_page, total))]
+        return Pagination([self.employee(row) for row in selected], page, per_page, total)
+
+class EmployeeSnapshots:
+    def __init__(self):
+        self.enabled = False
+        self.directory = None
+        self.python = None
+        self.build_delay = DEFAULT_BUILD_DELAY
+        self.current = None
+        self.builds = 0
+        self.hits = 0
+        self.misses = 0
+        self._process = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('SNAPSHOT_ENABLED', os.getenv('SNAPSHOT_ENABLED', '').lower() in ('1', 'true', 'yes', 'on'))
+        app.config.setdefault('SNAPSHOT_DIR', os.getenv('SNAPSHOT_DIR') or os.path.join(app.instance_path, 'snapshots'))
+        # Интерпретатор для build_snapshot.py; задаётся, если python3 не в PATH
+        app.config.setdefault('SNAPSHOT_PYTHON', os.getenv('SNAPSHOT_PYTHON') or python_executable())
+        app.config.setdefault('SNAPSHOT_BUILD_DELAY', float(os.getenv('SNAPSHOT_BUILD_DELAY', DEFAULT_BUILD_DELAY)))
+        self.enabled = app.config['SNAPSHOT_ENABLED']
+        self.directory = app.config['SNAPSHOT_DIR']
+        self.python = app.config['SNAPSHOT_PYTHON']
+        self.build_delay = app.config['SNAPSHOT_BUILD_DELAY']
+        app.extensions['snapshots'] = self
+
+    def get(self, version):
+        # Снимок нужной версии или None: тогда список читается из базы,
+        # а снимок строится в фоне
+        snapshot = self.current
+        if snapshot is not None and snapshot.version == version:
+            self.hits += 1
+            return snapshot
+        self.misses += 1
+        path = snapshot_path(self.directory, version)
+        if os.path.exists(path):
+            # Файл уже построил другой процесс. Сборка следующей версии могла
+            # успеть его удалить (remove_old) — тогда это такой же промах
+            try:
+                with self._lock:
+                    if self.current is None or self.current.version != version:
+                        self.current = Snapshot(path)
+            except OSError:
+                return None
+            return self.current
+        self.start_build()
+        return None
+
+    def start_build(self):
+        # Снимок строится отдельным процессом (build_snapshot.py): сборка
+        # большого справочника не занимает память и время воркера
+        with self._lock:
+            if self._process is not None and self._process.poll() is None:
+                return
+            env = dict(os.environ, SNAPSHOT_DIR=self.directory)
+            self._process = subprocess.Popen([self.python, BUILD_SCRIPT, '--delay', str(self.build_delay)],
+                                             env=env)
+            self.builds += 1
+            # Завершившийся процесс забирается сразу, чтобы не оставался зомби
+            threading.Thread(target=self._process.wait, name='snapshot-build', daemon=True).start()
+
+    def build(self):
+        # Версия и строки читаются в одной транзакции и соответствуют друг другу.
+        # Блокировка файла не даёт нескольким процессам строить снимок одновременно
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, 'build.lock'), 'w') as lock:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    return None
+            with db.engine.connect() as connection:
+                with connection.begin():
+                    version = connection.execute(
+                        select(DataVersion.version).where(DataVersion.name == EMPLOYEES)).scalar() or 0
+                    path = snapshot_path(self.directory, version)
+                    if not os.path.exists(path):
+                        write_snapshot(path, version, build_sections(connection))
+            self.remove_old(version)
+        with self._lock:
+            self.current = Snapshot(path)
+        return self.current
+
+    def remove_old(self, version):
+        # Процессы, которые ещё держат старый файл в памяти, продолжают
+        # читать его и после удаления
+        for path in glob.glob(os.path.join(self.directory, 'employees-*.snap')):
+            name = os.path.basename(path)
+            try:
+                file_version = int(name[len('employees-'):-len('.snap')])
+            except ValueError:
+                continue
+            if file_version < version:
+                os.remove(path)
+
+    def paginate(self, version, search, sort_field, sort_order, page, per_page):
+        if not self.enabled:
+            return None
+        snapshot = self.get(version)
+        if snapshot is None:
+            return None
+        return snapshot.page(search, sort_field, sort_order, page, per_page)
+
+    def stats(self):
+        snapshot = self.current
+        return {
+            'enabled': self.enabled,
+            'version': snapshot.version if snapshot else -1,
+            'rows': snapshot.count if snapshot else 0,
+            'file_bytes': snapshot.size if snapshot else 0,
+            'builds': self.builds,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+snapshots = EmployeeSnapshots()
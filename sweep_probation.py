@@ -0,0 +1,20 @@
+from app import app, db
+from probation import probation_sweep
+from datetime import date
+import argparse
+
+def sweep(today=None):
+    # Снимает испытательный срок всем, у кого он закончился к дате today.
+    # Сроки — из настроек PROBATION_DAYS и PROBATION_DAYS_BY_POSITION
+    with app.app_context():
+        with db.engine.begin() as connection:
+            cleared = probation_sweep.run(connection, today)
+    print(f"✅ Испытательный срок снят у сотрудников: {cleared}")
+    return cleared
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Снятие закончившихся испытательных сроков')
+    parser.add_argument('--today', type=date.fromisoformat, default=None,
+                        help='дата, на которую проверяются сроки (по умолчанию сегодня)')
+    args = parser.parse_args()
+    sweep(args.today)
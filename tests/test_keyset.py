@@ -0,0 +1,53 @@
+from flask import Flask
+from datetime import date, timedelta
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import db, Employee
+from queries import SORT_FIELDS, paginate_employees, paginate_employees_after, detach_items
+
+PER_PAGE = 7
+
+@pytest.fixture
+def app(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{tmp_path / "employees.db"}'
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        for number in range(50):
+            db.session.add(Employee(
+                full_name=f'Сотрудник {number % 9}', position=f'Должность {number % 4}',
+                gender='male' if number % 2 else 'female', phone=f'+7900000{number:04d}',
+                email=f'user{number}@example.com', on_probation=number % 3 == 1,
+                hire_date=date(2020, 1, 1) + timedelta(days=number % 5)))
+        db.session.commit()
+        # Флаг испытательного срока: да, нет и не указан (NULL) вперемешку.
+        # Явный None при вставке заменяется значением по умолчанию, поэтому UPDATE
+        db.session.execute(db.text('UPDATE employees SET on_probation = NULL WHERE id % 3 = 0'))
+        db.session.commit()
+        yield app
+
+def walk(sort_field, sort_order, first_page):
+    # Все id по ссылкам «Показать ещё», начиная с курсора после страницы со смещением
+    ids = [employee.id for employee in first_page.items]
+    cursor = first_page.cursor_after(sort_field)
+    while cursor:
+        page = paginate_employees_after('', sort_field, sort_order, cursor, PER_PAGE)
+        ids += [employee.id for employee in page.items]
+        cursor = page.next_cursor
+    return ids
+
+@pytest.mark.parametrize('sort_order', ['asc', 'desc'])
+@pytest.mark.parametrize('sort_field', ['id'] + SORT_FIELDS)
+def test_keyset_walks_every_row(app, sort_field, sort_order):
+    expected = [employee.id for employee in paginate_employees('', sort_field, sort_order, 1, 100).items]
+    first_page = paginate_employees('', sort_field, sort_order, 1, PER_PAGE)
+    assert walk(sort_field, sort_order, first_page) == expected
+    # Строки из кэша (EmployeeRow) дают тот же курсор, что и объекты Employee
+    first_page = detach_items(paginate_employees('', sort_field, sort_order, 1, PER_PAGE))
+    assert walk(sort_field, sort_order, first_page) == expected
@@ -0,0 +1,165 @@
+from sqlalchemy import event, select, func
+from sqlalchemy.orm import Session, attributes, object_session
+from models import db, Employee
+from data_version import get_data_version, session_versions
+import bisect
+import os
+import threading
+
+# Подсказки для строки поиска: ФИО и должности, начинающиеся с введённого текста.
+# Индекс в памяти процесса — отсортированный массив ключей, поиск — двоичный,
+# поэтому ответ не зависит от размера справочника. Ключи — начало каждого слова
+# значения до конца строки: «Петров Иван» находится и по «пет», и по «ив».
+#
+# Свои изменения процесс вносит в индекс сразу после фиксации транзакции.
+# Изменения других процессов видны по версии данных: если она ушла вперёд,
+# индекс перестраивается.
+
+TYPEAHEAD_FIELDS = ['position', 'full_name']
+
+def normalize(value):
+    # Нижний регистр, дефисы и точки как пробелы, одиночные пробелы между словами
+    return ' '.join(value.lower().replace('-', ' ').replace('.', ' ').split())
+
+def word_keys(value):
+    words = normalize(value).split(' ')
+    return [' '.join(words[start:]) for start in range(len(words))]
+
+class PrefixIndex:
+    def __init__(self, counts=None):
+        # Число сотрудников с каждым значением и параллельные массивы ключ -> значение
+        self.counts = dict(counts or {})
+        pairs = sorted((key, value) for value in self.counts for key in word_keys(value))
+        self.keys = [key for key, value in pairs]
+        self.owners = [value for key, value in pairs]
+
+    def add(self, value, count=1):
+        current = self.counts.get(value, 0)
+        self.counts[value] = current + count
+        if current == 0:
+            for key in word_keys(value):
+                position = bisect.bisect_right(self.keys, key)
+                self.keys.insert(position, key)
+                self.owners.insert(position, value)
+
+    def remove(self, value, count=1):
+        current = self.counts.get(value, 0)
+        if current > count:
+            self.counts[value] = current - count
+            return
+        self.counts.pop(value, None)
+        for key in word_keys(value):
+            position = bisect.bisect_left(self.keys, key)
+            while position < len(self.keys) and self.keys[position] == key:
+                if self.owners[position] == value:
+                    del self.keys[position]
+                    del self.owners[position]
+                    break
+                position += 1
+
+    def search(self, prefix, limit):
+        found = []
+        seen = set()
+        position = bisect.bisect_left(self.keys, prefix)
+        while position < len(self.keys) and len(found) < limit and self.keys[position].startswith(prefix):
+            value = self.owners[position]
+            if value not in seen:
+                seen.add(value)
+                found.append((value, self.counts[value]))
+            position += 1
+        return found
+
+class Typeahead:
+    def __init__(self):
+        self.indexes = None
+        self.version = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def build(self):
+        # Версия читается в той же транзакции, что и значения
+        version = get_data_version()
+        indexes = {}
+        for field in TYPEAHEAD_FIELDS:
+            column = getattr(Employee, field)
+            counts = dict(db.session.execute(select(column, func.count()).group_by(column)).all())
+            indexes[field] = PrefixIndex(counts)
+        with self._lock:
+            self.indexes = indexes
+            self.version = version
+            self._pid = os.getpid()
+
+    def ensure_current(self):
+        stale = self.indexes is None or self._pid != os.getpid() or self.version != get_data_version()
+        if not stale:
+            return
+        # Пока один поток перестраивает индекс, остальные отвечают по старому
+        if self._build_lock.acquire(blocking=self.indexes is None or self._pid != os.getpid()):
+            try:
+                self.build()
+            finally:
+                self._build_lock.release()
+
+    def suggest(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        self.ensure_current()
+        suggestions = []
+        with self._lock:
+            for field in TYPEAHEAD_FIELDS:
+                for value, count in self.indexes[field].search(prefix, limit - len(suggestions)):
+                    suggestions.append({'field': field, 'value': value, 'count': count})
+        return suggestions
+
+    def apply(self, changes, versions):
+        # changes — [(поле, старое значение, новое значение)], None — нет значения.
+        # Применяются, только если между версией индекса и этими изменениями
+        # не было чужих записей; иначе индекс перестроится при следующем запросе
+        with self._lock:
+            if self.indexes is None or self._pid != os.getpid() or not versions:
+                return
+            if self.version != versions[0] - 1:
+                return
+            for field, old, new in changes:
+                if old is not None:
+                    self.indexes[field].remove(old)
+                if new is not None:
+                    self.indexes[field].add(new)
+            self.version = versions[-1]
+
+typeahead = Typeahead()
+
+def _record(target, changes):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('typeahead_changes', []).extend(changes)
+
+@event.listens_for(Employee, 'after_insert')
+def _inserted(mapper, connection, target):
+    _record(target, [(field, None, getattr(target, field)) for field in TYPEAHEAD_FIELDS])
+
+@event.listens_for(Employee, 'before_update')
+def _updated(mapper, connection, target):
+    state = attributes.instance_state(target)
+    changes = []
+    for field in TYPEAHEAD_FIELDS:
+        history = state.attrs[field].load_history()
+        if history.deleted and history.deleted[0] != getattr(target, field):
+            changes.append((field, history.deleted[0], getattr(target, field)))
+    _record(target, changes)
+
+@event.listens_for(Employee, 'before_delete')
+def _deleted(mapper, connection, target):
+    _record(target, [(field, getattr(target, field), None) for field in TYPEAHEAD_FIELDS])
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed(session):
+    changes = session.info.pop('typeahead_changes', None)
+    if changes is not None:
+        typeahead.apply(changes, session_versions(session))
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_rolled_back(session):
+    session.info.pop('typeahead_changes', None)
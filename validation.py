@@ -0,0 +1,95 @@
+from datetime import datetime, date
+import re
+
+# Шаблоны компилируются один раз при импорте, а не при каждой проверке
+CREDENTIALS_RE = re.compile(r'^[a-zA-Z0-9!@#$%^&*()_+\-=\[\]{};\':"\\|,.<>\/?]*$')
+FULL_NAME_RE = re.compile(r'^[а-яА-ЯёЁ\s\-\.]+$')
+PHONE_RE = re.compile(r'^[\d\s\-\+\(\)]{10,20}$')
+NOT_DIGIT_RE = re.compile(r'[^\d]')
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+ISO_DATE_RE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+GENDERS = ('male', 'female')
+
+# Валидация данных
+def validate_credentials(login, password):
+    if not login or not password:
+        return False, "Логин и пароль не могут быть пустыми"
+
+    if not CREDENTIALS_RE.match(login):
+        return False, "Логин может содержать только латинские буквы, цифры и знаки препинания"
+
+    if not CREDENTIALS_RE.match(password):
+        return False, "Пароль может содержать только латинские буквы, цифры и знаки препинания"
+
+    return True, ""
+
+def parse_hire_date(value):
+    # Быстрый разбор для формата ГГГГ-ММ-ДД, для остального — strptime
+    if ISO_DATE_RE.match(value):
+        return date.fromisoformat(value)
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def check_employee_data(data, today=None):
+    # Возвращает список ошибок и разобранную дату устройства,
+    # чтобы не разбирать её повторно при сохранении
+    errors = []
+    hire_date = None
+
+    # Проверка ФИО
+    full_name = data.get('full_name', '').strip()
+    if not full_name or len(full_name) < 2:
+        errors.append("ФИО должно содержать не менее 2 символов")
+    elif len(full_name) > 100:
+        errors.append("ФИО не должно превышать 100 символов")
+    elif not FULL_NAME_RE.match(full_name):
+        errors.append("ФИО может содержать только русские буквы, пробелы, точки и дефисы")
+
+    # Проверка должности
+    position = data.get('position', '').strip()
+    if not position:
+        errors.append("Должность не может быть пустой")
+    elif len(position) > 100:
+        errors.append("Название должности не должно превышать 100 символов")
+
+    # Проверка пола
+    if not data.get('gender') or data['gender'] not in GENDERS:
+        errors.append("Укажите пол")
+
+    # Проверка телефона
+    phone = data.get('phone', '').strip()
+    if not phone:
+        errors.append("Телефон не может быть пустым")
+    elif not PHONE_RE.match(phone):
+        errors.append("Телефон должен содержать от 10 до 20 цифр и допустимых символов (+, -, (), пробелы)")
+    elif len(NOT_DIGIT_RE.sub('', phone)) < 10:
+        errors.append("Телефон должен содержать не менее 10 цифр")
+
+    # Проверка email
+    email = data.get('email', '').strip()
+    if not email:
+        errors.append("Email не может быть пустым")
+    elif not EMAIL_RE.match(email):
+        errors.append("Некорректный формат email")
+    elif len(email) > 100:
+        errors.append("Email не должен превышать 100 символов")
+
+    # Проверка даты устройства
+    hire_date_str = data.get('hire_date', '')
+    if not hire_date_str:
+        errors.append("Дата устройства на работу обязательна")
+    else:
+        try:
+            hire_date = parse_hire_date(hire_date_str)
+            if hire_date > (today or date.today()):
+                errors.append("Дата устройства не может быть в будущем")
+            if hire_date.year < 2000:
+                errors.append("Дата устройства не может быть раньше 2000 года")
+        except ValueError:
+            errors.append("Некорректный формат даты")
+
+    return errors, hire_date
+
+def validate_employee_data(data):
+    errors, hire_date = check_employee_data(data)
+    return errors
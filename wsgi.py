@@ -7,15 +7,17 @@ if path not in sys.path:
 
 # Устанавливаем переменные окружения
 os.environ['SECRET_KEY'] = 'pythonanywhere-secret-key-2024'
+# Запросы приходят через прокси PythonAnywhere: адрес клиента — в X-Forwarded-For
+# (число доверенных прокси; без этого лимиты входа по IP общие для всех)
+os.environ.setdefault('PROXY_FIX_X_FOR', '1')
 
 # Импортируем приложение
 from app import app as application
 
-# Инициализация базы данных
-with application.app_context():
-    from app import init_db
-    try:
-        init_db()
-        print("✅ База данных инициализирована успешно")
-    except Exception as e:
-        print(f"⚠️ Ошибка при инициализации базы данных: {e}")
\ No newline at end of file
+# Проверка версии схемы базы: один запрос, если база уже создана.
+# Создание таблиц и начальные данные — python bootstrap.py при развёртывании
+from bootstrap import ensure_schema
+try:
+    ensure_schema(application)
+except Exception as e:
+    print(f"⚠️ Ошибка при проверке базы данных: {e}")